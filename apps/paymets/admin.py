@@ -1,6 +1,133 @@
 # apps/paymets/admin.py
-from django.contrib import admin
-from .models import Bank, Payment
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.utils.functional import cached_property
 
-admin.site.register(Bank)
-admin.site.register(Payment)
\ No newline at end of file
+from .cache import invalidate_account_history
+from .models import Account, Bank, ImportBatch, Payment, PaymentArchive, PaymentTombstone
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор для таблиц на миллионы строк: на PostgreSQL берет оценку числа строк
+    из плана запроса (EXPLAIN) вместо COUNT(*), точный подсчет — только для небольших выборок.
+    """
+    EXACT_COUNT_THRESHOLD = 10_000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        connection = connections[getattr(self.object_list, "db", "default")]
+        if query is None or connection.vendor != "postgresql":
+            return super().count
+        sql, params = query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate < self.EXACT_COUNT_THRESHOLD:
+            return super().count
+        return estimate
+
+
+@admin.action(description="Удалить загрузки выбранных платежей целиком")
+def rollback_payment_batches(modeladmin, request, queryset):
+    batch_ids = set(queryset.exclude(batch=None).values_list("batch_id", flat=True).distinct())
+    deleted = sum(batch.rollback() for batch in ImportBatch.objects.filter(id__in=batch_ids))
+    modeladmin.message_user(
+        request, f"Удалено загрузок: {len(batch_ids)}, платежей: {deleted}", messages.SUCCESS
+    )
+
+
+@admin.action(description="Удалить выбранные загрузки вместе с платежами")
+def rollback_batches(modeladmin, request, queryset):
+    batches = list(queryset)
+    deleted = sum(batch.rollback() for batch in batches)
+    modeladmin.message_user(
+        request, f"Удалено загрузок: {len(batches)}, платежей: {deleted}", messages.SUCCESS
+    )
+
+
+@admin.register(Bank)
+class BankAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "email")
+    search_fields = ("name", "email")
+
+    def has_delete_permission(self, request, obj=None):
+        # Удаление банка каскадом снесло бы его загрузки и платежи без надгробий,
+        # а страница подтверждения перечислила бы каждый платеж. Сначала откатите загрузки
+        if obj is not None and (
+            ImportBatch.objects.filter(bank=obj).exists()
+            or Payment.objects.filter(source=obj).exists()
+            or PaymentArchive.objects.filter(source=obj).exists()
+        ):
+            return False
+        return super().has_delete_permission(request, obj)
+
+    def get_actions(self, request):
+        # delete_selected не смотрит на платежи конкретного банка — удаляем по одному
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+
+@admin.register(Account)
+class AccountAdmin(admin.ModelAdmin):
+    list_display = ("id", "number")
+    # Поиск по началу номера — использует уникальный индекс
+    search_fields = ("^number",)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+
+@admin.register(ImportBatch)
+class ImportBatchAdmin(admin.ModelAdmin):
+    list_display = ("id", "file_name", "bank", "user", "row_count", "created_at")
+    list_filter = ("bank",)
+    list_select_related = ("bank", "user")
+    raw_id_fields = ("user",)
+    search_fields = ("file_name", "=checksum")
+    date_hierarchy = "created_at"
+    actions = [rollback_batches]
+
+    def has_delete_permission(self, request, obj=None):
+        # Стандартное удаление (и кнопка на странице загрузки, и delete_selected) — каскад
+        # без надгробий ленты /payments/sync; удаляют только действием rollback_batches
+        return False
+
+
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ("id", "date", "account", "amount", "payment_id", "source", "added_by", "batch")
+    list_select_related = ("account", "source", "added_by", "batch")
+    list_filter = ("source", "added_by")
+    date_hierarchy = "date"
+    raw_id_fields = ("account", "source", "added_by", "batch")
+    # Точный поиск по номеру счета — через уникальный индекс Account.number
+    search_fields = ("=account__number",)
+    ordering = ("-id",)
+    list_per_page = 50
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    actions = [rollback_payment_batches]
+
+    def get_actions(self, request):
+        # delete_selected грузит все объекты для подтверждения и не пишет надгробия
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    def delete_model(self, request, obj):
+        rows = [(obj.pk, obj.added_by_id, obj.account_id)]
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            self._payments_deleted(rows)
+
+    def _payments_deleted(self, rows):
+        # Как и откат загрузки: надгробия для /payments/sync и сброс кэша истории счетов
+        PaymentTombstone.record((pk, user_id) for pk, user_id, _ in rows)
+        invalidate_account_history({account_id for _, _, account_id in rows})
+
+
+admin.site.register(Payment, PaymentAdmin)
+admin.site.register(PaymentArchive, PaymentAdmin)
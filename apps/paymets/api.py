@@ -1,21 +1,38 @@
 # apps/paymets/api.py
 import os
+import time
+import hashlib
 import tempfile
+from contextlib import closing
 from datetime import datetime, date
 from ninja import Router, Form, File, Schema, Query
 from ninja.files import UploadedFile
+from ninja.errors import HttpError
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from ninja_jwt.authentication import JWTAuth  # Импортируем правильный JWTAuth
-from .models import Bank, Payment
-from .schemas import BankIn, BankOut, BankUpdate, ParseIn
-from .parser_exсel import ExcelPaymentParser # Assuming the file is parser_exel.py; adjust if needed
-from typing import Optional, List
+from .models import Account, Bank, ImportBatch, Payment, PaymentArchive, PaymentTombstone, SyncCounter, from_tiyn, payment_fingerprint, to_tiyn
+from .cache import account_history_cache, archive_boundary, bank_cache, get_bank_or_404, invalidate_account_history
+from .duplicates import duplicate_groups, load_clusters
+from .pipeline import pipelined_batches
+from .throttling import parse_admission
+from .schemas import BankIn, BankOut, BankUpdate, ParseIn, ImportBatchOut
+from typing import Literal, Optional, List
 from pydantic import Field
-from django.db.models import Q
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Q, Sum
+from django.db.models.functions import Coalesce
+from django.db import DEFAULT_DB_ALIAS, router as db_router, transaction
+from zheu_backend import metrics
+from zheu_backend.db_router import use_replica
+from zheu_backend.renderers import dumps_json
 
 router = Router()  # Без auth здесь — оно теперь глобальное из urls.py
 
+INSERT_BATCH_SIZE = 1000
+PIPELINE_QUEUE_BATCHES = 4  # Сколько готовых пачек может ждать записи
+QUERY_ACCOUNT_CHUNK_SIZE = 500  # Счетов в одном запросе к БД при массовой выборке
+QUERY_STREAM_CHUNK_BYTES = 64 * 1024  # Строки NDJSON-выгрузки отдаются кусками примерно такого размера
+
 @router.post("/banks")
 def create_bank(request, payload: BankIn):
     bank = Bank.objects.create(**payload.dict())
@@ -23,12 +40,12 @@ def create_bank(request, payload: BankIn):
 
 @router.get("/banks", response=list[BankOut])
 def list_banks(request):
-    banks = Bank.objects.all()
+    banks = bank_cache.all()
     return [BankOut.from_orm(bank) for bank in banks]
 
 @router.get("/banks/{bank_id}", response=BankOut)
 def get_bank(request, bank_id: int):
-    bank = get_object_or_404(Bank, id=bank_id)
+    bank = get_bank_or_404(bank_id=bank_id)
     return BankOut.from_orm(bank)
 
 @router.put("/banks/{bank_id}")
@@ -51,34 +68,45 @@ def parse_file(request, email: str = Form(...), file: UploadedFile = File(...)):
     if not user:
         return HttpResponse("Unauthorized", status=401)
 
-    bank = get_object_or_404(Bank, email=email)
+    bank = get_bank_or_404(email=email)
+
+    # Не больше PAYMENTS_PARSE_MAX_PER_USER/MAX_GLOBAL разборов одновременно и
+    # PAYMENTS_PARSE_*_RATE загрузок за период, иначе 429 (apps/paymets/throttling.py)
+    with parse_admission(request, user.id):
+        return _parse_file(user, bank, email, file)
 
+def _parse_file(user, bank, email, file):
     # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-        for chunk in file.chunks():
-            tmp_file.write(chunk)
-        tmp_path = tmp_file.name
+    checksum = hashlib.sha256()
+    with metrics.phase("upload_spool"):
+        with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
+            for chunk in file.chunks():
+                tmp_file.write(chunk)
+                checksum.update(chunk)
+            tmp_path = tmp_file.name
 
+    parser = None
     try:
-        parser = ExcelPaymentParser(tmp_path)
-
-        # Extract domain from email to determine bank (e.g., 'kazpost' from 'reports@kazpost.kz')
+        # Парсер тянет openpyxl/xlrd (самая тяжелая часть импорта URLconf),
+        # поэтому загружаем его только при первом разборе файла
+        from .parser_exсel import ExcelPaymentParser
 
+        with metrics.phase("format_detection"):
+            parser = ExcelPaymentParser(tmp_path, hooks=metrics.parser_hooks())
 
         # Select parser based on email domain (case-insensitive)
         if 'reports@kazpost.kz' == email:
-            data = parser.extract_kazpost_data()
+            rows = parser.iter_kazpost_rows()
         elif 'imex@kaspi.kz' == email:
-            data = parser.extract_kaspi_data()  # Assuming this method exists
+            rows = parser.iter_kaspi_rows()
         elif 'ensemble@halykbank.kz' == email:
-            data = parser.extract_halyk_data()  # Assuming this method exists
+            rows = parser.iter_halyk_rows()
         elif 'info@bcc.kz' == email:
-            data = parser.extract_bcc_data()  # Assuming this method exists
+            rows = parser.iter_bcc_rows()
         else:
             raise ValueError(f"No parser available for bank email: {email}")
 
-        added_count = 0
-        for item in data:
+        def normalize(item):
             # Parse date string to date object, handling both formats
             date_str = item['Date']
             try:
@@ -87,40 +115,98 @@ def parse_file(request, email: str = Form(...), file: UploadedFile = File(...)):
                 try:
                     date_obj = datetime.strptime(date_str, '%d.%m.%Y').date()
                 except ValueError:
-                    continue  # Skip invalid dates
+                    return None  # Skip invalid dates
 
             payment_id = item.get('PaymentID', '')
+            amount_tiyn = to_tiyn(item['Amount'])
 
-            Payment.objects.create(
+            return item['Account'], Payment(
                 date=date_obj,
-                account_number=item['Account'],
-                amount=item['Amount'],
+                amount_tiyn=amount_tiyn,
                 payment_id=payment_id,
                 source=bank,
-                added_by=user
+                added_by=user,
+                fingerprint=payment_fingerprint(item['Account'], amount_tiyn, date_obj, payment_id)
             )
-            added_count += 1
 
-        return {"success": True, "added_payments": added_count}
+        # Разбор файла и вставка пачек идут параллельно (apps/paymets/pipeline.py):
+        # parse/normalize/backpressure замеряет фоновый поток, insert — сумма по пачкам здесь,
+        # каждая фаза попадает в гистограмму один раз за загрузку
+        added = 0
+        insert_seconds = 0.0
+        touched_accounts = set()
+        with transaction.atomic():
+            batch = ImportBatch.objects.create(
+                file_name=file.name or "",
+                bank=bank,
+                user=user,
+                checksum=checksum.hexdigest(),
+            )
+            # closing(): при ошибке вставки фоновый поток останавливается и дожидается здесь,
+            # до parser.close() в finally — иначе он может читать уже закрытый файл
+            with closing(pipelined_batches(
+                rows, normalize, INSERT_BATCH_SIZE, PIPELINE_QUEUE_BATCHES, observe=metrics.observe_phase
+            )) as batches:
+                for items in batches:
+                    started = time.perf_counter()
+                    account_ids = Account.objects.resolve(number for number, _ in items)
+                    payments = []
+                    for number, payment in items:
+                        payment.account_id = account_ids[number]
+                        payment.batch = batch
+                        payments.append(payment)
+                    Payment.objects.bulk_create(payments, batch_size=INSERT_BATCH_SIZE)
+                    insert_seconds += time.perf_counter() - started
+                    added += len(payments)
+                    touched_accounts.update(account_ids.values())
+            metrics.observe_phase("insert", insert_seconds)
+            batch.row_count = added
+            # Номер в ленте /payments/sync берется последним шагом — в порядке коммита
+            batch.sync_seq = SyncCounter.next_value()
+            batch.save(update_fields=["row_count", "sync_seq"])
+            invalidate_account_history(touched_accounts)
+
+        return {"success": True, "added_payments": added, "batch_id": batch.id}
     finally:
+        if parser is not None:
+            parser.close()
         os.unlink(tmp_path)
 
+def _payment_to_dict(p: Payment) -> dict:
+    return {
+        "id": p.id,
+        "date": p.date.isoformat(),
+        "account_number": p.account_number,
+        "amount": p.amount,
+        "payment_id": p.payment_id,
+        "bank_id": p.source_id,
+        "batch_id": p.batch_id
+    }
+
 class PaymentsQuery(Schema):
     bank_ids: Optional[List[int]] = Field(None)
     start_date: Optional[date] = None
     end_date: Optional[date] = None
     account_numbers: Optional[List[str]] = Field(None)
+    account_prefix: Optional[str] = Field(None, min_length=1, max_length=50)  # Начало номера счета
     page: int = Field(1, ge=1)
     page_size: int = Field(10, ge=1, le=100)
 
-@router.get("/payments")
-def get_payments(request, q: PaymentsQuery = Query(...)):
-    user = request.auth  # Теперь это работает через глобальный JWTAuth
-    if not user:
-        return HttpResponse("Unauthorized", status=401)
+# Поля для объединенного запроса по оперативной таблице и архиву
+PAYMENT_ROW_FIELDS = ("id", "date", "account__number", "amount_tiyn", "payment_id", "source_id", "batch_id")
 
-    queryset = Payment.objects.filter(added_by=user)
+def _payment_row_to_dict(row: dict) -> dict:
+    return {
+        "id": row["id"],
+        "date": row["date"].isoformat(),
+        "account_number": row["account__number"],
+        "amount": from_tiyn(row["amount_tiyn"]),
+        "payment_id": row["payment_id"],
+        "bank_id": row["source_id"],
+        "batch_id": row["batch_id"]
+    }
 
+def _filter_payments(queryset, q: PaymentsQuery):
     if q.bank_ids:
         queryset = queryset.filter(source__id__in=q.bank_ids)
 
@@ -131,27 +217,376 @@ def get_payments(request, q: PaymentsQuery = Query(...)):
         queryset = queryset.filter(date__lte=q.end_date)
 
     if q.account_numbers:
-        queryset = queryset.filter(account_number__in=q.account_numbers)
+        queryset = queryset.filter(account__number__in=q.account_numbers)
 
-    total = queryset.count()
+    if q.account_prefix:
+        queryset = queryset.filter(account__in=Account.objects.search_prefix(q.account_prefix))
+    return queryset
+
+@router.get("/payments")
+def get_payments(request, q: PaymentsQuery = Query(...)):
+    user = request.auth  # Теперь это работает через глобальный JWTAuth
+    if not user:
+        return HttpResponse("Unauthorized", status=401)
+
+    queryset = _filter_payments(Payment.objects.filter(added_by=user), q)
     offset = (q.page - 1) * q.page_size
-    payments = queryset.order_by('-date')[offset:offset + q.page_size]
 
-    payments_list = [
+    # Архив читаем, только если запрошенный период заходит в архивные даты
+    boundary = archive_boundary()
+    if boundary is None or (q.start_date and q.start_date > boundary):
+        total = queryset.count()
+        payments = queryset.select_related('account').order_by('-date')[offset:offset + q.page_size]
+        payments_list = [_payment_to_dict(p) for p in payments]
+    else:
+        archived = _filter_payments(PaymentArchive.objects.filter(added_by=user), q)
+        total = queryset.count() + archived.count()
+        rows = (
+            queryset.values(*PAYMENT_ROW_FIELDS)
+            .union(archived.values(*PAYMENT_ROW_FIELDS), all=True)
+            .order_by('-date', '-id')[offset:offset + q.page_size]
+        )
+        payments_list = [_payment_row_to_dict(row) for row in rows]
+
+    return {
+        "payments": payments_list,
+        "total": total,
+        "page": q.page,
+        "page_size": q.page_size,
+        "total_pages": (total + q.page_size - 1) // q.page_size
+    }
+
+class PaymentsBulkQuery(Schema):
+    account_numbers: List[str] = Field(..., min_length=1, max_length=50000)
+    bank_ids: Optional[List[int]] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+@router.post("/payments/query")
+@use_replica
+def query_payments(request, payload: PaymentsBulkQuery):
+    """
+    Сверка по большому списку лицевых счетов (например, целого района): номера
+    передаются в теле запроса, а не в query string. Счета ищутся пачками по
+    QUERY_ACCOUNT_CHUNK_SIZE, ответ — NDJSON (платеж на строку), отдается потоком.
+    Число неизвестных номеров — в заголовке X-Accounts-Not-Found.
+    """
+    user = request.auth
+    if not user:
+        return HttpResponse("Unauthorized", status=401)
+
+    # База выбирается сейчас: поток читается уже после выхода из view и middleware маршрутизации
+    db = db_router.db_for_read(Payment)
+    numbers = set(payload.account_numbers)
+    account_ids = sorted(Account.objects.db_manager(db).lookup(numbers).values())
+
+    models = [Payment]
+    boundary = archive_boundary()
+    if boundary is not None and (payload.start_date is None or payload.start_date <= boundary):
+        models.append(PaymentArchive)
+
+    def stream():
+        # Строки копятся в буфер: кусок на строку — это лишняя запись в сокет
+        # и плохое сжатие потока (CompressionMiddleware) на каждые ~100 байт
+        buffer, size = [], 0
+        for i in range(0, len(account_ids), QUERY_ACCOUNT_CHUNK_SIZE):
+            chunk = account_ids[i:i + QUERY_ACCOUNT_CHUNK_SIZE]
+            for model in models:
+                queryset = model.objects.using(db).filter(added_by=user, account_id__in=chunk)
+                if payload.bank_ids:
+                    queryset = queryset.filter(source_id__in=payload.bank_ids)
+                if payload.start_date:
+                    queryset = queryset.filter(date__gte=payload.start_date)
+                if payload.end_date:
+                    queryset = queryset.filter(date__lte=payload.end_date)
+                rows = queryset.order_by('account_id', 'date', 'id').values(*PAYMENT_ROW_FIELDS)
+                for row in rows.iterator(chunk_size=2000):
+                    line = dumps_json(_payment_row_to_dict(row)) + b"\n"
+                    buffer.append(line)
+                    size += len(line)
+                    if size >= QUERY_STREAM_CHUNK_BYTES:
+                        yield b"".join(buffer)
+                        buffer, size = [], 0
+        if buffer:
+            yield b"".join(buffer)
+
+    response = StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+    response["X-Accounts-Not-Found"] = str(len(numbers) - len(account_ids))
+    return response
+
+
+class AccountSearchQuery(Schema):
+    q: str = Field(..., min_length=1, max_length=50)
+    mode: Literal["prefix", "contains"] = "prefix"  # contains — не короче 3 символов
+    limit: int = Field(20, ge=1, le=100)
+
+@router.get("/accounts/search")
+def search_accounts(request, q: AccountSearchQuery = Query(...)):
+    """Поиск лицевых счетов пользователя по началу или части номера."""
+    user = request.auth
+    if not user:
+        return HttpResponse("Unauthorized", status=401)
+
+    if q.mode == "prefix":
+        accounts = Account.objects.search_prefix(q.q)
+    else:
+        try:
+            accounts = Account.objects.search_contains(q.q)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+
+    # Только счета, по которым у пользователя есть платежи (в том числе архивные)
+    accounts = accounts.filter(
+        Exists(Payment.objects.filter(account=OuterRef("pk"), added_by=user))
+        | Exists(PaymentArchive.objects.filter(account=OuterRef("pk"), added_by=user))
+    )
+    numbers = list(accounts.order_by("number").values_list("number", flat=True)[:q.limit + 1])
+
+    return {
+        "accounts": numbers[:q.limit],
+        "truncated": len(numbers) > q.limit
+    }
+
+
+class AccountHistoryQuery(Schema):
+    page: int = Field(1, ge=1)
+    page_size: int = Field(50, ge=1, le=200)
+
+def _account_history(user, account, q: AccountHistoryQuery) -> dict:
+    # Всегда с primary, как BankCache: ответ ложится в кэш под текущим штампом версии,
+    # и отстающая реплика закрепила бы под ним итоги без только что закоммиченной загрузки
+    hot = Payment.objects.using(DEFAULT_DB_ALIAS).filter(account=account, added_by=user)
+    querysets = [hot]
+    if archive_boundary() is not None:
+        querysets.append(PaymentArchive.objects.using(DEFAULT_DB_ALIAS).filter(account=account, added_by=user))
+
+    # Итоги считаются по индексу (account, added_by, date, amount_tiyn) без чтения строк таблицы
+    count, amount_tiyn, first_date, last_date = 0, 0, None, None
+    for queryset in querysets:
+        totals = queryset.aggregate(
+            count=Count("id"), amount=Sum("amount_tiyn"), first=Min("date"), last=Max("date")
+        )
+        count += totals["count"]
+        amount_tiyn += totals["amount"] or 0
+        if totals["first"] and (first_date is None or totals["first"] < first_date):
+            first_date = totals["first"]
+        if totals["last"] and (last_date is None or totals["last"] > last_date):
+            last_date = totals["last"]
+
+    rows = querysets[0].values(*PAYMENT_ROW_FIELDS)
+    for queryset in querysets[1:]:
+        rows = rows.union(queryset.values(*PAYMENT_ROW_FIELDS), all=True)
+    offset = (q.page - 1) * q.page_size
+    rows = rows.order_by('-date', '-id')[offset:offset + q.page_size]
+
+    return {
+        "account_number": account.number,
+        "totals": {
+            "count": count,
+            "amount": from_tiyn(amount_tiyn),
+            "first_date": first_date.isoformat() if first_date else None,
+            "last_date": last_date.isoformat() if last_date else None
+        },
+        "payments": [_payment_row_to_dict(row) for row in rows],
+        "page": q.page,
+        "page_size": q.page_size,
+        "total_pages": (count + q.page_size - 1) // q.page_size
+    }
+
+@router.get("/accounts/{account_number}/history")
+def account_history(request, account_number: str, q: AccountHistoryQuery = Query(...)):
+    """Все платежи пользователя по лицевому счету (включая архив) с итогами."""
+    user = request.auth
+    if not user:
+        return HttpResponse("Unauthorized", status=401)
+
+    account = get_object_or_404(Account, number=account_number)
+    return account_history_cache.get_or_compute(
+        account.id, (user.id, q.page, q.page_size), lambda: _account_history(user, account, q)
+    )
+
+
+class DuplicatesQuery(Schema):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    page: int = Field(1, ge=1)
+    page_size: int = Field(20, ge=1, le=100)
+
+@router.get("/duplicates")
+def list_duplicates(request, q: DuplicatesQuery = Query(...)):
+    """Платежи, пришедшие в реестрах нескольких банков (один и тот же счет, сумма, дата и № платежа)."""
+    user = request.auth
+    if not user:
+        return HttpResponse("Unauthorized", status=401)
+
+    queryset = Payment.objects.filter(added_by=user)
+    if q.start_date:
+        queryset = queryset.filter(date__gte=q.start_date)
+    if q.end_date:
+        queryset = queryset.filter(date__lte=q.end_date)
+
+    groups = duplicate_groups(queryset)
+    total = groups.count()
+    offset = (q.page - 1) * q.page_size
+    page = groups.order_by("fingerprint")[offset:offset + q.page_size]
+
+    clusters = [
         {
-            "id": p.id,
-            "date": p.date.isoformat(),
-            "account_number": p.account_number,
-            "amount": p.amount,
-            "payment_id": p.payment_id,
-            "bank_id": p.source.id if p.source else None
-        } for p in payments
+            "fingerprint": str(group["fingerprint"]),
+            "bank_ids": sorted({p.source_id for p in payments}),
+            "payments": [_payment_to_dict(p) for p in payments]
+        }
+        for group, payments in load_clusters(queryset, page)
     ]
 
     return {
-        "payments": payments_list,
+        "clusters": clusters,
+        "total": total,
+        "page": q.page,
+        "page_size": q.page_size,
+        "total_pages": (total + q.page_size - 1) // q.page_size
+    }
+
+
+class BatchesQuery(Schema):
+    bank_ids: Optional[List[int]] = Field(None)
+    page: int = Field(1, ge=1)
+    page_size: int = Field(20, ge=1, le=100)
+
+@router.get("/batches")
+def list_batches(request, q: BatchesQuery = Query(...)):
+    user = request.auth
+    if not user:
+        return HttpResponse("Unauthorized", status=401)
+
+    queryset = ImportBatch.objects.filter(user=user)
+    if q.bank_ids:
+        queryset = queryset.filter(bank_id__in=q.bank_ids)
+
+    total = queryset.count()
+    offset = (q.page - 1) * q.page_size
+    batches = queryset.order_by('-id')[offset:offset + q.page_size]
+
+    return {
+        "batches": [ImportBatchOut.from_orm(b).dict() for b in batches],
         "total": total,
         "page": q.page,
         "page_size": q.page_size,
         "total_pages": (total + q.page_size - 1) // q.page_size
     }
+
+@router.delete("/batches/{batch_id}")
+def delete_batch(request, batch_id: int):
+    user = request.auth
+    if not user:
+        return HttpResponse("Unauthorized", status=401)
+
+    batch = get_object_or_404(ImportBatch, id=batch_id, user=user)
+    deleted = batch.rollback()
+    return {"success": True, "deleted_payments": deleted}
+
+
+class SyncQuery(Schema):
+    cursor: Optional[str] = None  # next_cursor из предыдущего ответа; пусто — с начала
+    limit: int = Field(1000, ge=1, le=10000)
+
+def _parse_cursor(cursor: Optional[str]):
+    if not cursor:
+        return 0, 0
+    try:
+        seq, last_id = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise HttpError(400, "Invalid cursor")
+    return seq, last_id
+
+def _sync_payments_after(user, seq, last_id, high, limit):
+    """
+    Платежи ленты после позиции (seq, last_id) в порядке (номер коммита, id), не больше limit.
+    Старые платежи без загрузки (созданные до ImportBatch) идут первыми с номером 0;
+    новые без загрузки не появляются — Payment.save() заводит им загрузку.
+    Архив читается вместе с оперативной таблицей: archive_payments переносит строки
+    с тем же id и batch, поэтому архивация не выбрасывает их из ленты.
+    """
+    found = []
+
+    def take(filters, exclude=None):
+        need = limit - len(found)
+        rows = []
+        for model in (Payment, PaymentArchive):
+            queryset = model.objects.filter(**filters)
+            if exclude:
+                queryset = queryset.exclude(**exclude)
+            rows += (
+                queryset.select_related('account').annotate(feed_seq=Coalesce(F('batch__sync_seq'), 0))
+                .order_by('feed_seq', 'id')[:need]
+            )
+        rows.sort(key=lambda p: (p.feed_seq, p.id))
+        found.extend((p.feed_seq, p) for p in rows[:need])
+
+    if seq == 0:
+        take({"added_by": user, "batch": None, "id__gt": last_id})
+
+    # Загрузки берутся окнами примерно на limit строк (по row_count): два запроса к платежам
+    # на окно вместо двух на каждую загрузку. Загрузки с одним номером коммита (seed_payments)
+    # попадают в одно окно — их платежи идут вместе по id. Если строки загрузки уже удалены
+    # по одной, окно дает меньше limit и берется следующее
+    batches = (
+        ImportBatch.objects.filter(user=user, sync_seq__gte=max(seq, 1), sync_seq__lte=high)
+        .order_by('sync_seq', 'id').values_list('id', 'sync_seq', 'row_count')
+    )
+    window, window_rows, window_seq = [], 0, None
+    for batch_id, batch_seq, row_count in batches.iterator():
+        if batch_seq != window_seq and len(found) + window_rows >= limit:
+            if window:
+                take({"batch_id__in": window}, {"batch__sync_seq": seq, "id__lte": last_id})
+                window, window_rows = [], 0
+            if len(found) >= limit:
+                break
+        window.append(batch_id)
+        window_rows += row_count
+        window_seq = batch_seq
+    if window and len(found) < limit:
+        take({"batch_id__in": window}, {"batch__sync_seq": seq, "id__lte": last_id})
+    return found
+
+@router.get("/sync")
+def sync_payments(request, q: SyncQuery = Query(...)):
+    """
+    Лента изменений для внешних систем: платежи, добавленные после курсора,
+    и id платежей, удаленных откатом загрузки (tombstones).
+    Порядок — по номеру коммита загрузки или удаления (SyncCounter), внутри него по id;
+    курсор "<номер коммита>:<id>", клиент передает next_cursor, пока has_more не станет false.
+    """
+    user = request.auth
+    if not user:
+        return HttpResponse("Unauthorized", status=401)
+
+    seq, last_id = _parse_cursor(q.cursor)
+
+    # Номера до текущего значения счетчика уже закоммичены все; более новые
+    # в этот ответ не берем, чтобы не перескочить загрузку, которая коммитится прямо сейчас
+    high = SyncCounter.objects.values_list('value', flat=True).first() or 0
+
+    events = [
+        (unit_seq, p.id, _payment_to_dict(p), None)
+        for unit_seq, p in _sync_payments_after(user, seq, last_id, high, q.limit + 1)
+    ]
+    tombstones = (
+        PaymentTombstone.objects.filter(added_by=user, sync_seq__lte=high)
+        .filter(Q(sync_seq__gt=seq) | Q(sync_seq=seq, id__gt=last_id))
+        .order_by('sync_seq', 'id').values_list('sync_seq', 'id', 'payment_pk')[:q.limit + 1]
+    )
+    events += [(unit_seq, pk, None, payment_pk) for unit_seq, pk, payment_pk in tombstones]
+    # Номер коммита принадлежит либо загрузке, либо удалению, поэтому (номер, id) однозначен
+    events.sort(key=lambda event: event[:2])
+    has_more = len(events) > q.limit
+    events = events[:q.limit]
+    if events:
+        seq, last_id = events[-1][:2]
+
+    return {
+        "payments": [payment for _, _, payment, _ in events if payment is not None],
+        "deleted": [payment_pk for _, _, payment, payment_pk in events if payment is None],
+        "next_cursor": f"{seq}:{last_id}",
+        "has_more": has_more
+    }
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PaymetsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.paymets"
+
+    def ready(self):
+        from . import signals  # noqa: F401  # Регистрируем обработчики сигналов
@@ -0,0 +1,167 @@
+# apps/paymets/cache.py
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Max
+from django.http import Http404
+
+from .models import Bank, PaymentArchive
+
+BANK_CACHE_VERSION_KEY = "paymets:banks:version"
+ARCHIVE_BOUNDARY_KEY = "paymets:archive:boundary"
+
+
+class BankCache:
+    """
+    Процессный кэш банков (по id и по email).
+    Банков единицы и меняются они редко, поэтому держим их целиком в памяти.
+    Актуальность проверяется по штампу версии в общем кэше Django:
+    любой воркер, изменивший банк, пишет новый штамп, остальные перечитывают таблицу.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._banks = []
+        self._by_id = {}
+        self._by_email = {}
+
+    def _current_version(self) -> str:
+        version = cache.get(BANK_CACHE_VERSION_KEY)
+        if version is None:
+            # Ключ еще не создан или вытеснен — создаем новый штамп
+            cache.add(BANK_CACHE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(BANK_CACHE_VERSION_KEY)
+        return version
+
+    def _ensure_loaded(self):
+        # Версию читаем до запроса к БД: если банк изменят во время загрузки,
+        # штамп не совпадет и при следующем обращении таблица будет перечитана
+        version = self._current_version()
+        if version is not None and version == self._version:
+            return
+        with self._lock:
+            if version is not None and version == self._version:
+                return
+            # Всегда с primary: загрузка с отстающей реплики закрепила бы
+            # устаревшие данные под новым штампом версии
+            banks = list(Bank.objects.db_manager(DEFAULT_DB_ALIAS).order_by("id"))
+            self._banks = banks
+            self._by_id = {bank.id: bank for bank in banks}
+            self._by_email = {bank.email: bank for bank in banks}
+            self._version = version
+
+    def all(self) -> list:
+        self._ensure_loaded()
+        return list(self._banks)
+
+    def get(self, bank_id: int):
+        self._ensure_loaded()
+        return self._by_id.get(bank_id)
+
+    def get_by_email(self, email: str):
+        self._ensure_loaded()
+        return self._by_email.get(email)
+
+    def invalidate(self):
+        """Сбрасывает локальную копию и публикует новый штамп версии для остальных воркеров."""
+        with self._lock:
+            self._version = None
+        cache.set(BANK_CACHE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+bank_cache = BankCache()
+
+
+def get_bank_or_404(bank_id: int = None, email: str = None) -> Bank:
+    """Аналог get_object_or_404 для банков, но без запроса к БД."""
+    if bank_id is not None:
+        bank = bank_cache.get(bank_id)
+    else:
+        bank = bank_cache.get_by_email(email)
+    if bank is None:
+        raise Http404("No Bank matches the given query.")
+    return bank
+
+
+def archive_boundary():
+    """
+    Самая поздняя дата в архиве платежей (None — архив пуст).
+    Архив меняется только командой archive_payments, поэтому значение живет в общем кэше
+    до ее следующего запуска. Откат загрузки может удалить архивные строки — граница
+    тогда остается завышенной, что лишь добавляет лишний (пустой) запрос к архиву.
+    """
+    value = cache.get(ARCHIVE_BOUNDARY_KEY)
+    if value is None:
+        # С primary: значение живет в кэше без срока, отставание реплики закрепилось бы надолго
+        latest = PaymentArchive.objects.using(DEFAULT_DB_ALIAS).aggregate(latest=Max("date"))["latest"]
+        value = latest.isoformat() if latest else ""
+        cache.set(ARCHIVE_BOUNDARY_KEY, value, timeout=None)
+    return date.fromisoformat(value) if value else None
+
+
+def invalidate_archive_boundary():
+    cache.delete(ARCHIVE_BOUNDARY_KEY)
+
+
+def _account_version_key(account_id) -> str:
+    return f"paymets:account:{account_id}:version"
+
+
+class AccountHistoryCache:
+    """
+    Процессный LRU-кэш ответов истории счета (/payments/accounts/{number}/history)
+    не больше max_entries записей. Каждая запись помечена штампом версии счета
+    из общего кэша Django: загрузка или откат, затронувшие счет, пишут новый штамп,
+    и записи этого счета во всех воркерах перестают совпадать.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _current_version(self, account_id) -> str:
+        key = _account_version_key(account_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(key)
+        return version
+
+    def get_or_compute(self, account_id, key, compute):
+        """Значение для (account_id, key) из кэша или compute(); версию читаем до запроса к БД."""
+        version = self._current_version(account_id)
+        entry_key = (account_id, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(entry_key)
+                return entry[1]
+        value = compute()
+        with self._lock:
+            self._entries[entry_key] = (version, value)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+account_history_cache = AccountHistoryCache(settings.PAYMENTS_ACCOUNT_HISTORY_CACHE_SIZE)
+
+
+def invalidate_account_history(account_ids):
+    """Новые штампы версий для счетов — после коммита текущей транзакции."""
+    keys = [_account_version_key(account_id) for account_id in set(account_ids)]
+    if not keys:
+        return
+    transaction.on_commit(lambda: cache.set_many({key: uuid.uuid4().hex for key in keys}, timeout=None))
@@ -0,0 +1,39 @@
+# apps/paymets/duplicates.py
+"""
+Поиск дублей одного платежа в реестрах разных банков (например, Казпочта и Халык).
+Платежи группируются по отпечатку (Payment.fingerprint) в самой БД — GROUP BY по
+индексу (added_by, fingerprint) вместо попарного сравнения строк.
+"""
+from django.db.models import Count
+
+GROUP_FIELDS = ("added_by", "fingerprint")
+
+
+def duplicate_groups(queryset):
+    """
+    Группы (added_by, fingerprint), в которых есть платежи хотя бы двух банков.
+    Каждая группа — словарь с added_by, fingerprint, banks и payments (количества).
+    """
+    return (
+        queryset.exclude(fingerprint=None)
+        .order_by()
+        .values(*GROUP_FIELDS)
+        .annotate(banks=Count("source", distinct=True), payments=Count("id"))
+        .filter(banks__gt=1)
+    )
+
+
+def load_clusters(queryset, groups) -> list:
+    """Платежи выбранных групп одним запросом: [(группа, [Payment, ...]), ...] в порядке groups."""
+    groups = list(groups)
+    members = {(group["added_by"], group["fingerprint"]): [] for group in groups}
+    payments = (
+        queryset.filter(fingerprint__in={group["fingerprint"] for group in groups})
+        .select_related("account")
+        .order_by("date", "id")
+    )
+    for payment in payments:
+        key = (payment.added_by_id, payment.fingerprint)
+        if key in members:
+            members[key].append(payment)
+    return [(group, members[(group["added_by"], group["fingerprint"])]) for group in groups]
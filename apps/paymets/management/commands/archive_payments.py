@@ -0,0 +1,73 @@
+# apps/paymets/management/commands/archive_payments.py
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.paymets.cache import invalidate_archive_boundary
+from apps.paymets.models import Payment, PaymentArchive
+
+# Поля, переносимые в архив как есть. id и batch_id сохраняются: лента /payments/sync
+# читает архив наравне с оперативной таблицей, так что перенос — не удаление и надгробий не пишет
+ARCHIVE_FIELDS = [
+    "id", "date", "account_id", "amount_tiyn", "payment_id",
+    "source_id", "added_by_id", "added_at", "batch_id", "fingerprint",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит платежи старше горизонта (PAYMENTS_ARCHIVE_HORIZON_DAYS) в архивную таблицу "
+        "пачками, каждая пачка — отдельная короткая транзакция"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horizon-days", type=int, default=settings.PAYMENTS_ARCHIVE_HORIZON_DAYS,
+                            help="Архивировать платежи с датой старше стольких дней")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Строк в одной транзакции")
+        parser.add_argument("--limit", type=int, default=0, help="Максимум строк за запуск (0 — без ограничения)")
+        parser.add_argument("--dry-run", action="store_true", help="Только посчитать, сколько строк будет перенесено")
+
+    def handle(self, *args, **options):
+        if options["horizon_days"] < 1:
+            raise CommandError("--horizon-days должен быть положительным")
+        cutoff = timezone.localdate() - timedelta(days=options["horizon_days"])
+        queryset = Payment.objects.filter(date__lt=cutoff)
+
+        if options["dry_run"]:
+            self.stdout.write(f"К архивации (дата < {cutoff}): {queryset.count()} платежей")
+            return
+
+        batch_size = options["batch_size"]
+        limit = options["limit"]
+        moved = 0
+        started = time.perf_counter()
+        try:
+            while not limit or moved < limit:
+                size = min(batch_size, limit - moved) if limit else batch_size
+                moved_now = self._move_batch(queryset, size)
+                if not moved_now:
+                    break
+                moved += moved_now
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"  {moved} платежей перенесено ({moved / elapsed:.0f} строк/с)")
+        finally:
+            if moved:
+                invalidate_archive_boundary()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Перенесено в архив {moved} платежей (дата < {cutoff}) за {time.perf_counter() - started:.1f} с"
+        ))
+
+    def _move_batch(self, queryset, size) -> int:
+        with transaction.atomic():
+            # Блокируем пачку (на PostgreSQL), чтобы параллельный откат загрузки не удалил строки между копированием и удалением
+            rows = list(queryset.select_for_update().order_by("id").values(*ARCHIVE_FIELDS)[:size])
+            if not rows:
+                return 0
+            PaymentArchive.objects.bulk_create([PaymentArchive(**row) for row in rows])
+            Payment.objects.filter(id__in=[row["id"] for row in rows]).delete()
+        return len(rows)
@@ -0,0 +1,52 @@
+# apps/paymets/management/commands/find_duplicates.py
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.paymets.duplicates import duplicate_groups, load_clusters
+from apps.paymets.models import Payment
+
+
+class Command(BaseCommand):
+    help = (
+        "Выводит платежи, попавшие в реестры нескольких банков "
+        "(совпадают счет, сумма, дата и № платежа — Payment.fingerprint)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Имя пользователя (по умолчанию — все пользователи)")
+        parser.add_argument("--start-date", type=date.fromisoformat, help="Дата платежа с (YYYY-MM-DD)")
+        parser.add_argument("--end-date", type=date.fromisoformat, help="Дата платежа по (YYYY-MM-DD)")
+        parser.add_argument("--limit", type=int, default=50, help="Сколько групп вывести (0 — только количество)")
+
+    def handle(self, *args, **options):
+        queryset = Payment.objects.all()
+        if options["user"]:
+            try:
+                queryset = queryset.filter(added_by=User.objects.get(username=options["user"]))
+            except User.DoesNotExist:
+                raise CommandError(f"Пользователь {options['user']} не найден")
+        if options["start_date"]:
+            queryset = queryset.filter(date__gte=options["start_date"])
+        if options["end_date"]:
+            queryset = queryset.filter(date__lte=options["end_date"])
+
+        groups = duplicate_groups(queryset)
+        total = groups.count()
+        self.stdout.write(f"Групп дублей: {total}")
+        if not options["limit"]:
+            return
+
+        for group, payments in load_clusters(queryset, groups.order_by("added_by", "fingerprint")[:options["limit"]]):
+            self.stdout.write(
+                f"fingerprint={group['fingerprint']} user_id={group['added_by']} "
+                f"банков: {group['banks']}, платежей: {group['payments']}"
+            )
+            for p in payments:
+                self.stdout.write(
+                    f"  id={p.id} bank_id={p.source_id} batch_id={p.batch_id} "
+                    f"{p.date} {p.account_number} {p.amount} № {p.payment_id}"
+                )
+        if total > options["limit"]:
+            self.stdout.write(f"... и еще {total - options['limit']} групп (--limit)")
@@ -0,0 +1,78 @@
+# apps/paymets/management/commands/importtime_report.py
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Выполняется в отдельном процессе: холодный старт воркера до загрузки URLconf
+# (__import__, а не importlib.import_module — последний не попадает в отчет -X importtime)
+PROBE = (
+    "import django, resource; django.setup(); "
+    "__import__({urlconf!r}); "
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+# Модули, которые не должны попадать в старт воркера (нужны только для /payments/parse)
+DEFAULT_FORBIDDEN = ["openpyxl", "xlrd", "apps.paymets.parser_exсel"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет время импорта и RSS при старте воркера (python -X importtime) "
+        "и проверяет, что тяжелые зависимости парсера не загружаются вместе с URLconf"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=15, help="Сколько самых медленных модулей показать")
+        parser.add_argument("--forbid", action="append", default=None,
+                            help=f"Модуль, запрещенный при старте (по умолчанию: {', '.join(DEFAULT_FORBIDDEN)})")
+        parser.add_argument("--budget-ms", type=float, default=None, help="Допустимое время импорта URLconf, мс")
+        parser.add_argument("--rss-budget-mb", type=float, default=None, help="Допустимый RSS после старта, МБ")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "zheu_backend.settings"))
+        probe = PROBE.format(urlconf=settings.ROOT_URLCONF)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Не удалось запустить замер:\n{result.stderr[-2000:]}")
+
+        modules = self._parse_importtime(result.stderr)
+        # ru_maxrss на Linux — в килобайтах
+        rss_mb = int(result.stdout.strip().splitlines()[-1]) / 1024
+        total_ms = sum(self_us for self_us, _ in modules.values()) / 1000
+        urlconf_ms = modules.get(settings.ROOT_URLCONF, (0, 0))[1] / 1000
+
+        self.stdout.write(f"Всего импорт: {total_ms:.1f} мс, URLconf ({settings.ROOT_URLCONF}): {urlconf_ms:.1f} мс")
+        self.stdout.write(f"Пиковый RSS после старта: {rss_mb:.1f} МБ, модулей: {len(modules)}")
+        self.stdout.write("Самые медленные модули (cumulative, мс):")
+        slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:options["top"]]
+        for name, (self_us, cumulative_us) in slowest:
+            self.stdout.write(f"  {cumulative_us / 1000:9.1f}  {self_us / 1000:8.1f}  {name}")
+
+        problems = []
+        forbidden = options["forbid"] or DEFAULT_FORBIDDEN
+        loaded = sorted(name for name in forbidden if name in modules)
+        if loaded:
+            problems.append(f"при старте загружены тяжелые модули: {', '.join(loaded)}")
+        if options["budget_ms"] is not None and urlconf_ms > options["budget_ms"]:
+            problems.append(f"импорт URLconf {urlconf_ms:.1f} мс > бюджета {options['budget_ms']} мс")
+        if options["rss_budget_mb"] is not None and rss_mb > options["rss_budget_mb"]:
+            problems.append(f"RSS {rss_mb:.1f} МБ > бюджета {options['rss_budget_mb']} МБ")
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("OK"))
+
+    def _parse_importtime(self, stderr):
+        """Строки вида 'import time: self [us] | cumulative | imported package' -> {модуль: (self, cumulative)}."""
+        modules = {}
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "imported package" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        return modules
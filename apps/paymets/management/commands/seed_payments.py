@@ -0,0 +1,148 @@
+# apps/paymets/management/commands/seed_payments.py
+import random
+import time
+from itertools import accumulate
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.paymets.models import Account, Bank, ImportBatch, Payment, SyncCounter, payment_fingerprint
+
+# Реальные банки, для которых есть парсеры, и их примерная доля в потоке платежей
+KNOWN_BANKS = [
+    ("imex@kaspi.kz", "Kaspi", 55),
+    ("ensemble@halykbank.kz", "Халык Банк", 20),
+    ("reports@kazpost.kz", "Казпочта", 15),
+    ("info@bcc.kz", "БЦК Банк", 10),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет БД синтетическими пользователями, банками и платежами "
+        "для нагрузочного тестирования (scripts/loadtest.py)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="Количество пользователей loadtest_user_N")
+        parser.add_argument("--password", default="loadtest-pass", help="Пароль для созданных пользователей")
+        parser.add_argument("--banks", type=int, default=4, help="Количество банков (сверх известных создаются синтетические)")
+        parser.add_argument("--payments", type=int, default=1_000_000, help="Количество платежей")
+        parser.add_argument("--accounts", type=int, default=300_000, help="Количество различных лицевых счетов")
+        parser.add_argument("--days", type=int, default=730, help="Глубина истории в днях от --end-date")
+        parser.add_argument("--end-date", type=date.fromisoformat, default=date.today(), help="Последняя дата платежей (YYYY-MM-DD)")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Размер пачки bulk_create")
+        parser.add_argument("--seed", type=int, default=42, help="Seed генератора случайных чисел")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        users = self._ensure_users(options["users"], options["password"])
+        banks, bank_weights = self._ensure_banks(options["banks"])
+        self.stdout.write(f"Пользователей: {len(users)}, банков: {len(banks)}")
+
+        # Лицевые счета: 10-значные номера, частота оплат по закону Ципфа —
+        # небольшая часть счетов платит часто, длинный хвост платит редко
+        accounts = [str(1_000_000_000 + i) for i in range(options["accounts"])]
+        account_ids = Account.objects.resolve(accounts)
+        # Кумулятивные веса считаем один раз, а не на каждую пачку
+        account_weights = list(accumulate(1.0 / (rank + 1) ** 0.8 for rank in range(len(accounts))))
+        # Каждый счет закреплен за одним пользователем (оператором ЖЭУ)
+        account_owner = {acc: users[i % len(users)] for i, acc in enumerate(accounts)}
+
+        dates, date_weights = self._date_distribution(options["end_date"], options["days"])
+        date_weights = list(accumulate(date_weights))
+        bank_weights = list(accumulate(bank_weights))
+
+        total = options["payments"]
+        batch_size = options["batch_size"]
+        created = 0
+        started = time.perf_counter()
+        while created < total:
+            size = min(batch_size, total - created)
+            batch_accounts = rng.choices(accounts, cum_weights=account_weights, k=size)
+            batch_dates = rng.choices(dates, cum_weights=date_weights, k=size)
+            batch_banks = rng.choices(banks, cum_weights=bank_weights, k=size)
+            payments = []
+            for i in range(size):
+                account = batch_accounts[i]
+                # Суммы коммунальных платежей: логнормальное распределение вокруг ~5000 тг
+                amount_tiyn = round(min(rng.lognormvariate(8.5, 0.7), 10_000_000) * 100)
+                payment_id = str(rng.randrange(10**9, 10**10))
+                payments.append(Payment(
+                    date=batch_dates[i],
+                    account_id=account_ids[account],
+                    amount_tiyn=amount_tiyn,
+                    payment_id=payment_id,
+                    source=batch_banks[i],
+                    added_by=account_owner[account],
+                    fingerprint=payment_fingerprint(account, amount_tiyn, batch_dates[i], payment_id),
+                ))
+            with transaction.atomic():
+                # У загрузки один банк и один пользователь: пачка делится по этим парам
+                import_batches = {}
+                for payment in payments:
+                    key = (payment.added_by.id, payment.source.id)
+                    if key not in import_batches:
+                        import_batches[key] = ImportBatch.objects.create(
+                            file_name="seed_payments", bank=payment.source, user=payment.added_by
+                        )
+                    payment.batch = import_batches[key]
+                    import_batches[key].row_count += 1
+                Payment.objects.bulk_create(payments, batch_size=batch_size)
+                # Номер коммита последним шагом, как в /payments/parse, — иначе платежи не попадут в /payments/sync
+                sync_seq = SyncCounter.next_value()
+                for import_batch in import_batches.values():
+                    import_batch.sync_seq = sync_seq
+                ImportBatch.objects.bulk_update(import_batches.values(), ["row_count", "sync_seq"])
+            created += size
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {created}/{total} платежей ({created / elapsed:.0f} строк/с)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано {created} платежей за {time.perf_counter() - started:.1f} с"
+        ))
+
+    def _ensure_users(self, count, password):
+        users = []
+        for i in range(count):
+            user, created = User.objects.get_or_create(
+                username=f"loadtest_user_{i}",
+                defaults={"email": f"loadtest_user_{i}@example.com"},
+            )
+            if created:
+                user.set_password(password)
+                user.save(update_fields=["password"])
+            users.append(user)
+        return users
+
+    def _ensure_banks(self, count):
+        banks, weights = [], []
+        for i in range(count):
+            if i < len(KNOWN_BANKS):
+                email, name, weight = KNOWN_BANKS[i]
+            else:
+                email, name, weight = f"reports@bank{i}.example.kz", f"Банк {i}", 5
+            bank, _ = Bank.objects.get_or_create(email=email, defaults={"name": name})
+            banks.append(bank)
+            weights.append(weight)
+        return banks, weights
+
+    def _date_distribution(self, end_date, days):
+        """
+        Веса дат: поток платежей растет к последним месяцам (экспоненциально),
+        в выходные платят реже, а в первые 25 дней месяца — чаще (период оплаты квитанций).
+        """
+        dates, weights = [], []
+        for offset in range(days):
+            day = end_date - timedelta(days=offset)
+            weight = 0.997 ** offset
+            if day.weekday() >= 5:
+                weight *= 0.6
+            if day.day <= 25:
+                weight *= 1.5
+            dates.append(day)
+            weights.append(weight)
+        return dates, weights
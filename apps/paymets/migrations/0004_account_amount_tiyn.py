@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("paymets", "0003_sync_feed"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Account",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("number", models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="amount_tiyn",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="account",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="paymets.account",
+            ),
+        ),
+    ]
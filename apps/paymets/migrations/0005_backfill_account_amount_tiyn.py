@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:03
+
+from django.db import migrations, models, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Cast, Round
+
+CHUNK_SIZE = 10000
+
+
+def backfill_accounts_and_tiyn(apps, schema_editor):
+    """
+    Переносит номера лицевых счетов в справочник Account и суммы в тиыны.
+    Таблица платежей большая, поэтому обновляем диапазонами id короткими транзакциями.
+    """
+    Account = apps.get_model("paymets", "Account")
+    Payment = apps.get_model("paymets", "Payment")
+    db = schema_editor.connection.alias
+
+    numbers = (
+        Payment.objects.using(db)
+        .order_by()
+        .values_list("account_number", flat=True)
+        .distinct()
+    )
+    accounts = []
+    for number in numbers.iterator(chunk_size=CHUNK_SIZE):
+        accounts.append(Account(number=number))
+        if len(accounts) >= CHUNK_SIZE:
+            Account.objects.using(db).bulk_create(accounts, ignore_conflicts=True)
+            accounts = []
+    if accounts:
+        Account.objects.using(db).bulk_create(accounts, ignore_conflicts=True)
+
+    account_id = Subquery(
+        Account.objects.using(db).filter(number=OuterRef("account_number")).values("id")[:1]
+    )
+    last_id = 0
+    while True:
+        ids = list(
+            Payment.objects.using(db)
+            .filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:CHUNK_SIZE]
+        )
+        if not ids:
+            break
+        with transaction.atomic(using=db):
+            Payment.objects.using(db).filter(id__gte=ids[0], id__lte=ids[-1]).update(
+                account_id=account_id,
+                amount_tiyn=Cast(Round(F("amount") * 100), models.BigIntegerField()),
+            )
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("paymets", "0004_account_amount_tiyn"),
+    ]
+
+    operations = [
+        # Обратный перенос выполняется в 0006, где старые колонки создаются заново
+        migrations.RunPython(backfill_accounts_and_tiyn, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast
+
+
+def restore_account_number_and_amount(apps, schema_editor):
+    """Обратный перенос: номер счета и сумма в тенге снова хранятся в самом платеже."""
+    Account = apps.get_model("paymets", "Account")
+    Payment = apps.get_model("paymets", "Payment")
+    db = schema_editor.connection.alias
+    Payment.objects.using(db).update(
+        account_number=Subquery(
+            Account.objects.using(db).filter(id=OuterRef("account_id")).values("number")[:1]
+        ),
+        amount=Cast(
+            F("amount_tiyn") / Value(100.0),
+            models.DecimalField(max_digits=15, decimal_places=2),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("paymets", "0005_backfill_account_amount_tiyn"),
+    ]
+
+    # Старые колонки сначала становятся nullable: при откате они создаются
+    # пустыми, заполняются RunPython и только потом снова становятся NOT NULL
+    operations = [
+        migrations.AlterField(
+            model_name="payment",
+            name="account_number",
+            field=models.CharField(max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name="payment",
+            name="amount",
+            field=models.DecimalField(decimal_places=2, max_digits=15, null=True),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, restore_account_number_and_amount),
+        migrations.RemoveField(
+            model_name="payment",
+            name="account_number",
+        ),
+        migrations.RemoveField(
+            model_name="payment",
+            name="amount",
+        ),
+        migrations.AlterField(
+            model_name="payment",
+            name="account",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT, to="paymets.account"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="payment",
+            name="amount_tiyn",
+            field=models.BigIntegerField(),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("paymets", "0006_compact_payment_storage"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentArchive",
+            fields=[
+                ("date", models.DateField()),
+                ("amount_tiyn", models.BigIntegerField()),
+                ("payment_id", models.CharField(blank=True, max_length=100, null=True)),
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("added_at", models.DateTimeField()),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="paymets.account",
+                    ),
+                ),
+                (
+                    "added_by",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "batch",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="paymets.importbatch",
+                    ),
+                ),
+                (
+                    "source",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="paymets.bank"
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["added_by", "date"], name="archive_user_date_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("paymets", "0008_payment_date_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountNgram",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("gram", models.CharField(max_length=3)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ngrams",
+                        to="paymets.account",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("gram", "account"), name="account_ngram_uniq"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:14
+
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 5000
+NGRAM_SIZE = 3
+
+
+def build_search_indexes(apps, schema_editor):
+    """
+    PostgreSQL: GIN-индекс pg_trgm по номеру счета (LIKE '%...%' идет по индексу).
+    Остальные СУБД: заполняем таблицу триграмм для уже существующих счетов.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS account_number_trgm_idx "
+            "ON paymets_account USING gin (number gin_trgm_ops)"
+        )
+        return
+
+    Account = apps.get_model("paymets", "Account")
+    AccountNgram = apps.get_model("paymets", "AccountNgram")
+    db = connection.alias
+    last_id = 0
+    while True:
+        accounts = list(
+            Account.objects.using(db)
+            .filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "number")[:CHUNK_SIZE]
+        )
+        if not accounts:
+            break
+        grams = [
+            AccountNgram(account_id=account_id, gram=number[i:i + NGRAM_SIZE])
+            for account_id, number in accounts
+            for i in range(len(number) - NGRAM_SIZE + 1)
+        ]
+        with transaction.atomic(using=db):
+            AccountNgram.objects.using(db).bulk_create(grams, ignore_conflicts=True)
+        last_id = accounts[-1][0]
+
+
+def drop_search_indexes(apps, schema_editor):
+    # Таблица триграмм удаляется откатом 0009
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS account_number_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("paymets", "0009_account_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(build_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("paymets", "0010_account_search_backfill"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="fingerprint",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="paymentarchive",
+            name="fingerprint",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["added_by", "fingerprint"], name="payment_user_fingerprint_idx"
+            ),
+        ),
+    ]
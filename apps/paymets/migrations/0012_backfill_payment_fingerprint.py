@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:31
+
+import hashlib
+
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 5000
+
+
+def fingerprint(account_number, amount_tiyn, date, payment_id):
+    # Копия apps.paymets.models.payment_fingerprint на момент миграции
+    normalized_id = str(payment_id or "").strip().lower().lstrip("0")
+    key = f"{str(account_number).strip().lstrip('0')}|{amount_tiyn}|{date.isoformat()}|{normalized_id}"
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """Считает отпечатки для уже загруженных платежей (оперативная таблица и архив) пачками по id."""
+    db = schema_editor.connection.alias
+    for model_name in ("Payment", "PaymentArchive"):
+        Model = apps.get_model("paymets", model_name)
+        last_id = 0
+        while True:
+            rows = list(
+                Model.objects.using(db)
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "account__number", "amount_tiyn", "date", "payment_id")[:CHUNK_SIZE]
+            )
+            if not rows:
+                break
+            objs = [
+                Model(id=pk, fingerprint=fingerprint(number, amount_tiyn, date, payment_id))
+                for pk, number, amount_tiyn, date, payment_id in rows
+            ]
+            with transaction.atomic(using=db):
+                Model.objects.using(db).bulk_update(objs, ["fingerprint"], batch_size=1000)
+            last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("paymets", "0011_payment_fingerprint"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
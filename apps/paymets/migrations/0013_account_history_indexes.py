@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("paymets", "0012_backfill_payment_fingerprint"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["account", "added_by", "date", "amount_tiyn"],
+                name="payment_account_history_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="paymentarchive",
+            index=models.Index(
+                fields=["account", "added_by", "date", "amount_tiyn"],
+                name="archive_account_history_idx",
+            ),
+        ),
+    ]
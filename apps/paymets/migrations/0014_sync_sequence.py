@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("paymets", "0013_account_history_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="paymenttombstone",
+            name="tombstone_user_id_idx",
+        ),
+        migrations.AddField(
+            model_name="importbatch",
+            name="sync_seq",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="paymenttombstone",
+            name="sync_seq",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="importbatch",
+            index=models.Index(fields=["user", "sync_seq"], name="batch_user_sync_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="paymentarchive",
+            index=models.Index(fields=["added_by", "id"], name="archive_user_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="paymenttombstone",
+            index=models.Index(
+                fields=["added_by", "sync_seq", "id"], name="tombstone_user_sync_idx"
+            ),
+        ),
+    ]
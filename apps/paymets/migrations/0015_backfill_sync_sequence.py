@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:30
+
+from django.db import migrations
+
+CHUNK_SIZE = 1000
+
+
+def backfill_sync_sequence(apps, schema_editor):
+    """
+    Нумерует уже закоммиченные загрузки по id, затем одним номером — существующие надгробия,
+    и ставит счетчик SyncCounter на последний выданный номер.
+    """
+    db = schema_editor.connection.alias
+    ImportBatch = apps.get_model("paymets", "ImportBatch")
+    PaymentTombstone = apps.get_model("paymets", "PaymentTombstone")
+    SyncCounter = apps.get_model("paymets", "SyncCounter")
+
+    seq = 0
+    batch_ids = list(ImportBatch.objects.using(db).order_by("id").values_list("id", flat=True))
+    for start in range(0, len(batch_ids), CHUNK_SIZE):
+        objs = []
+        for pk in batch_ids[start:start + CHUNK_SIZE]:
+            seq += 1
+            objs.append(ImportBatch(id=pk, sync_seq=seq))
+        ImportBatch.objects.using(db).bulk_update(objs, ["sync_seq"])
+
+    if PaymentTombstone.objects.using(db).exists():
+        seq += 1
+        PaymentTombstone.objects.using(db).update(sync_seq=seq)
+
+    SyncCounter.objects.using(db).update_or_create(pk=1, defaults={"value": seq})
+
+
+def clear_sync_sequence(apps, schema_editor):
+    apps.get_model("paymets", "SyncCounter").objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("paymets", "0014_sync_sequence"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sync_sequence, clear_sync_sequence),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("paymets", "0015_backfill_sync_sequence"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ParseSlot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=100, unique=True)),
+                ("token", models.CharField(max_length=32)),
+                ("expires_at", models.DateTimeField()),
+            ],
+        ),
+    ]
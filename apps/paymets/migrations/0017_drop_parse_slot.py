@@ -0,0 +1,16 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("paymets", "0016_parse_slot"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="ParseSlot",
+        ),
+    ]
@@ -1,7 +1,32 @@
 # apps/payments/models.py
-from django.db import models
+import hashlib
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import connections, models, transaction
+from django.db.models import Count, F
 from django.contrib.auth.models import User
 
+
+def to_tiyn(amount) -> int:
+    """Сумма в тенге (float/str/Decimal) -> целое число тиынов."""
+    return int((Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_tiyn(amount_tiyn: int) -> Decimal:
+    return Decimal(amount_tiyn).scaleb(-2)
+
+
+def payment_fingerprint(account_number: str, amount_tiyn: int, date, payment_id) -> int:
+    """
+    Отпечаток платежа для поиска дублей между реестрами разных банков:
+    64-битный хэш нормализованных счета, суммы, даты и идентификатора платежа
+    (без пробелов, ведущих нулей и регистра). Влезает в BIGINT и индекс по нему компактный.
+    """
+    normalized_id = str(payment_id or "").strip().lower().lstrip("0")
+    key = f"{str(account_number).strip().lstrip('0')}|{amount_tiyn}|{date.isoformat()}|{normalized_id}"
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
 class Bank(models.Model):
     email = models.EmailField(unique=True)
     name = models.CharField(max_length=255)
@@ -9,14 +34,273 @@ class Bank(models.Model):
     def __str__(self):
         return self.name
 
-class Payment(models.Model):
+NGRAM_SIZE = 3
+
+
+def account_ngrams(number: str) -> set:
+    """Триграммы номера счета для поиска по подстроке (таблица AccountNgram)."""
+    return {number[i:i + NGRAM_SIZE] for i in range(len(number) - NGRAM_SIZE + 1)}
+
+
+class AccountManager(models.Manager):
+    RESOLVE_CHUNK_SIZE = 500
+
+    def _uses_ngram_table(self) -> bool:
+        # На PostgreSQL подстроку ищет GIN-индекс pg_trgm (миграция 0010),
+        # на остальных СУБД — вспомогательная таблица триграмм
+        return connections[self.db].vendor != "postgresql"
+
+    def resolve(self, numbers) -> dict:
+        """
+        Возвращает {номер счета: id}, создавая недостающие счета.
+        Запросы идут пачками, чтобы не упираться в лимит параметров SQL.
+        """
+        numbers = list(set(numbers))
+        ids = {}
+        for i in range(0, len(numbers), self.RESOLVE_CHUNK_SIZE):
+            chunk = numbers[i:i + self.RESOLVE_CHUNK_SIZE]
+            found = dict(self.filter(number__in=chunk).values_list("number", "id"))
+            missing = [number for number in chunk if number not in found]
+            if missing:
+                # ignore_conflicts — на случай параллельной загрузки тех же счетов
+                self.bulk_create([Account(number=number) for number in missing], ignore_conflicts=True)
+                created = dict(self.filter(number__in=missing).values_list("number", "id"))
+                if self._uses_ngram_table():
+                    AccountNgram.objects.bulk_create(
+                        [
+                            AccountNgram(account_id=account_id, gram=gram)
+                            for number, account_id in created.items()
+                            for gram in account_ngrams(number)
+                        ],
+                        ignore_conflicts=True,
+                    )
+                found.update(created)
+            ids.update(found)
+        return ids
+
+    def lookup(self, numbers) -> dict:
+        """{номер счета: id} только для существующих счетов, пачками по RESOLVE_CHUNK_SIZE."""
+        numbers = list(set(numbers))
+        ids = {}
+        for i in range(0, len(numbers), self.RESOLVE_CHUNK_SIZE):
+            chunk = numbers[i:i + self.RESOLVE_CHUNK_SIZE]
+            ids.update(self.filter(number__in=chunk).values_list("number", "id"))
+        return ids
+
+    def search_prefix(self, prefix: str):
+        """
+        Счета, номер которых начинается с prefix. Диапазон [prefix, следующий префикс)
+        идет по уникальному индексу number на любой СУБД, в отличие от LIKE.
+        """
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return self.filter(number__gte=prefix, number__lt=upper)
+
+    def search_contains(self, text: str):
+        """Счета, номер которых содержит text (не короче NGRAM_SIZE символов)."""
+        if len(text) < NGRAM_SIZE:
+            raise ValueError(f"Для поиска по подстроке нужно не меньше {NGRAM_SIZE} символов")
+        queryset = self.filter(number__contains=text)
+        if not self._uses_ngram_table():
+            return queryset
+        # Кандидаты — счета, у которых есть все триграммы запроса; contains отсекает ложные совпадения
+        grams = account_ngrams(text)
+        candidates = (
+            AccountNgram.objects.filter(gram__in=grams)
+            .values("account_id")
+            .annotate(matched=Count("gram"))
+            .filter(matched=len(grams))
+            .values("account_id")
+        )
+        return queryset.filter(id__in=candidates)
+
+class Account(models.Model):
+    """Лицевой счет. Номер хранится один раз, платежи ссылаются на него по FK."""
+    number = models.CharField(max_length=50, unique=True)  # № лицевого счета
+
+    objects = AccountManager()
+
+    def __str__(self):
+        return self.number
+
+class AccountNgram(models.Model):
+    """Триграммы номеров счетов для поиска по подстроке без полного просмотра (кроме PostgreSQL)."""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="ngrams")
+    gram = models.CharField(max_length=NGRAM_SIZE)
+
+    class Meta:
+        constraints = [
+            # Служит и индексом для поиска по gram
+            models.UniqueConstraint(fields=["gram", "account"], name="account_ngram_uniq"),
+        ]
+
+class SyncCounter(models.Model):
+    """
+    Номера коммитов для ленты /payments/sync (одна строка с id=1).
+    id и added_at выдаются до коммита, и параллельная загрузка может закоммитить меньший id позже,
+    поэтому лента идет не по ним, а по номеру, который транзакция берет последним шагом.
+    """
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def next_value(cls) -> int:
+        """
+        Следующий номер. UPDATE держит блокировку строки до коммита вызывающей транзакции,
+        поэтому номера раздаются строго в порядке коммитов.
+        """
+        if not transaction.get_connection().in_atomic_block:
+            raise RuntimeError("SyncCounter.next_value() вызывается внутри транзакции изменения")
+        if not cls.objects.filter(pk=1).update(value=F("value") + 1):
+            cls.objects.get_or_create(pk=1)
+            cls.objects.filter(pk=1).update(value=F("value") + 1)
+        return cls.objects.values_list("value", flat=True).get(pk=1)
+
+class ImportBatch(models.Model):
+    """Одна загрузка выписки через /payments/parse — позволяет целиком откатить загруженный файл."""
+    file_name = models.CharField(max_length=255)
+    bank = models.ForeignKey(Bank, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    row_count = models.PositiveIntegerField(default=0)
+    checksum = models.CharField(max_length=64)  # sha256 содержимого файла
+    created_at = models.DateTimeField(auto_now_add=True)
+    sync_seq = models.BigIntegerField(null=True, blank=True)  # SyncCounter на момент коммита загрузки
+
+    class Meta:
+        indexes = [
+            # Лента синхронизации: загрузки пользователя в порядке коммита
+            models.Index(fields=["user", "sync_seq"], name="batch_user_sync_idx"),
+        ]
+
+    ROLLBACK_CHUNK_SIZE = 5000
+
+    def rollback(self, chunk_size: int = ROLLBACK_CHUNK_SIZE) -> int:
+        """
+        Удаляет платежи загрузки короткими транзакциями по chunk_size строк
+        (чтобы не держать блокировку на таблице), затем саму загрузку.
+        Возвращает количество удаленных платежей.
+        """
+        from .cache import invalidate_account_history
+
+        deleted = 0
+        account_ids = set()
+        # Часть платежей старой загрузки может уже лежать в архиве
+        for model in (Payment, PaymentArchive):
+            while True:
+                rows = list(
+                    model.objects.filter(batch=self).values_list("id", "added_by_id", "account_id")[:chunk_size]
+                )
+                if not rows:
+                    break
+                with transaction.atomic():
+                    count, _ = model.objects.filter(id__in=[pk for pk, _, _ in rows]).delete()
+                    # Надгробия для ленты синхронизации (/payments/sync)
+                    PaymentTombstone.record((pk, user_id) for pk, user_id, _ in rows)
+                deleted += count
+                account_ids.update(account_id for _, _, account_id in rows)
+        self.delete()
+        invalidate_account_history(account_ids)
+        return deleted
+
+    def __str__(self):
+        return f"{self.file_name} ({self.row_count})"
+
+class PaymentBase(models.Model):
+    """Общие поля оперативной таблицы платежей и архива."""
     date = models.DateField()
-    account_number = models.CharField(max_length=50)  # № лицевого счета
-    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    account = models.ForeignKey(Account, on_delete=models.PROTECT)  # № лицевого счета
+    amount_tiyn = models.BigIntegerField()  # Сумма в тиынах (1 тенге = 100 тиын)
     payment_id = models.CharField(max_length=100, blank=True, null=True)  # Идентификатор платежа или Номер платежа
     source = models.ForeignKey(Bank, on_delete=models.CASCADE)
     added_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     added_at = models.DateTimeField(auto_now_add=True)
+    batch = models.ForeignKey(ImportBatch, on_delete=models.CASCADE, null=True, blank=True)  # Загрузка, создавшая платеж
+    fingerprint = models.BigIntegerField(null=True, blank=True)  # payment_fingerprint(), для поиска дублей
+
+    class Meta:
+        abstract = True
+
+    # Совместимость с прежними полями: API отдает номер счета и сумму в тенге.
+    # Для account_number загружайте платежи с select_related("account")
+    @property
+    def account_number(self) -> str:
+        return self.account.number
+
+    @property
+    def amount(self) -> Decimal:
+        return from_tiyn(self.amount_tiyn)
+
+    @amount.setter
+    def amount(self, value):
+        self.amount_tiyn = to_tiyn(value)
+
+    def save(self, *args, **kwargs):
+        # bulk_create (загрузка выписок) заполняет отпечаток сам, здесь — правки по одной записи
+        self.fingerprint = payment_fingerprint(self.account_number, self.amount_tiyn, self.date, self.payment_id)
+        super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"Payment {self.account_number} - {self.amount}"
\ No newline at end of file
+        return f"Payment {self.account_number} - {self.amount}"
+
+class Payment(PaymentBase):
+    class Meta:
+        indexes = [
+            # Лента синхронизации: старые платежи без загрузки (созданные до ImportBatch) по id
+            models.Index(fields=["added_by", "id"], name="payment_user_id_idx"),
+            # /payments и админка: выборка по пользователю и периоду, date_hierarchy
+            models.Index(fields=["added_by", "date"], name="payment_user_date_idx"),
+            models.Index(fields=["date"], name="payment_date_idx"),
+            # Группировка по отпечатку при поиске дублей
+            models.Index(fields=["added_by", "fingerprint"], name="payment_user_fingerprint_idx"),
+            # История счета: фильтр, сортировка по дате и итоги по сумме — только по индексу
+            models.Index(fields=["account", "added_by", "date", "amount_tiyn"], name="payment_account_history_idx"),
+        ]
+
+    MANUAL_BATCH_FILE_NAME = "Добавлен вручную"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding or self.batch_id is not None:
+            return super().save(*args, **kwargs)
+        # Платеж вне загрузки (админка, скрипты) получает свою загрузку с номером коммита,
+        # иначе лента /payments/sync его не отдаст
+        with transaction.atomic():
+            self.batch = ImportBatch.objects.create(
+                file_name=self.MANUAL_BATCH_FILE_NAME, bank=self.source, user=self.added_by, row_count=1,
+                sync_seq=SyncCounter.next_value(),
+            )
+            super().save(*args, **kwargs)
+
+class PaymentArchive(PaymentBase):
+    """
+    Платежи старше PAYMENTS_ARCHIVE_HORIZON_DAYS, перенесенные командой archive_payments.
+    id совпадает с id исходного Payment, поэтому ссылки внешних систем (/payments/sync) не меняются.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    added_at = models.DateTimeField()  # Переносится как есть, без auto_now_add
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["added_by", "id"], name="archive_user_id_idx"),
+            models.Index(fields=["added_by", "date"], name="archive_user_date_idx"),
+            models.Index(fields=["account", "added_by", "date", "amount_tiyn"], name="archive_account_history_idx"),
+        ]
+
+class PaymentTombstone(models.Model):
+    """Запись об удалении платежа (откат загрузки) для ленты синхронизации."""
+    payment_pk = models.BigIntegerField()  # id удаленного Payment
+    added_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    sync_seq = models.BigIntegerField(null=True, blank=True)  # SyncCounter транзакции удаления
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["added_by", "sync_seq", "id"], name="tombstone_user_sync_idx"),
+        ]
+
+    @classmethod
+    def record(cls, deleted):
+        """Надгробия для пар (id платежа, id пользователя); вызывается в транзакции удаления."""
+        objs = [cls(payment_pk=pk, added_by_id=user_id) for pk, user_id in deleted]
+        if objs:
+            sync_seq = SyncCounter.next_value()
+            for obj in objs:
+                obj.sync_seq = sync_seq
+            cls.objects.bulk_create(objs)
@@ -1,28 +1,134 @@
 import os
+import time
+import logging
+from collections import Counter
+from contextlib import contextmanager
 import xlrd
 from zipfile import BadZipFile
 from openpyxl import Workbook, load_workbook
 from openpyxl.worksheet.worksheet import Worksheet
 import xml.etree.ElementTree as ET
 
+logger = logging.getLogger(__name__)
+
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+class PhaseStats:
+    """
+    Статистика одной фазы разбора: сколько строк просмотрено, принято,
+    пропущено (по причинам), сколько байт прочитано и сколько заняло времени.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows_scanned = 0
+        self.rows_accepted = 0
+        self.skipped = Counter()
+        self.bytes_read = 0
+        self.elapsed = 0.0
+        self.started_at = 0.0
+        self.paused = 0.0
+
+    def skip(self, reason: str):
+        self.skipped[reason] += 1
+
+    @contextmanager
+    def pause(self):
+        """Время, пока генератор фазы ждет потребителя строки, в elapsed не входит."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.paused += time.perf_counter() - started
+
+    def as_dict(self) -> dict:
+        return {
+            "phase": self.name,
+            "rows_scanned": self.rows_scanned,
+            "rows_accepted": self.rows_accepted,
+            "rows_skipped": dict(self.skipped),
+            "bytes_read": self.bytes_read,
+            "elapsed": round(self.elapsed, 6),
+        }
+
+
 class ExcelPaymentParser:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, hooks=None):
+        """
+        hooks — необязательный список функций hook(stats: PhaseStats),
+        вызываемых по завершении каждой фазы (загрузка файла, извлечение строк).
+        Собранная статистика также доступна в self.profile (имя фазы -> PhaseStats).
+        """
         self.file_path = file_path
-        self.sheet = self._ensure_xlsx()
+        self.hooks = list(hooks or [])
+        self.profile = {}
+        self._source = None  # Открытый xlsx: в режиме read_only лист читается из файла по мере обхода
+        with self._phase("load") as stats:
+            stats.bytes_read = os.path.getsize(file_path)
+            self.sheet = self._ensure_xlsx()
+            stats.rows_scanned = self.sheet.max_row or 0
+
+    def close(self):
+        """Закрывает файл xlsx; после этого строки листа читать нельзя."""
+        if self._source is not None:
+            self.sheet.parent.close()
+            self._source.close()
+            self._source = None
+
+    def _begin_phase(self, name: str) -> PhaseStats:
+        stats = PhaseStats(name)
+        stats.started_at = time.perf_counter()
+        return stats
+
+    def _end_phase(self, stats: PhaseStats):
+        stats.elapsed = time.perf_counter() - stats.started_at - stats.paused
+        self.profile[stats.name] = stats
+        # Одна строка на фазу вместо дампа всех строк файла
+        logger.debug("parse phase %s: %s", stats.name, stats.as_dict())
+        for hook in self.hooks:
+            hook(stats)
+
+    @contextmanager
+    def _phase(self, name: str):
+        stats = self._begin_phase(name)
+        try:
+            yield stats
+        finally:
+            self._end_phase(stats)
 
     def _ensure_xlsx(self) -> Worksheet:
         ext = os.path.splitext(self.file_path)[1].lower()
 
-        if ext == ".xlsx":
+        with open(self.file_path, 'rb') as f:
+            header = f.read(20)  # Read enough to check XML declaration / ZIP signature
+
+        # Загруженные файлы сохраняются во временный файл без расширения,
+        # поэтому xlsx распознаем и по сигнатуре ZIP
+        if ext == ".xlsx" or header.startswith(ZIP_MAGIC):
+            # Передаем файловый объект: по пути openpyxl проверяет расширение.
+            # read_only — строки читаются потоком, в памяти не держится весь лист;
+            # файл остается открытым до close()
+            f = open(self.file_path, 'rb')
             try:
-                wb = load_workbook(self.file_path, data_only=True)
-                return wb.active
+                wb = load_workbook(f, read_only=True, data_only=True)
             except BadZipFile:
-                pass  # Proceed to try as .xls or XML
-
+                f.close()  # Proceed to try as .xls or XML
+            except Exception:
+                f.close()
+                raise
+            else:
+                self._source = f
+                sheet = wb.active
+                unsized = sheet.max_row is None or sheet.max_column is None
+                if unsized and any(sheet.iter_rows(values_only=True)):
+                    # Без <dimension> строки не выравниваются по ширине — досчитываем размер отдельным проходом
+                    sheet.calculate_dimension(force=True)
+                return sheet
+
+        # XML и .xls переносятся в обычный Workbook целиком: для них память
+        # не ограничивается очередью конвейера, в отличие от xlsx
         # Check if it's XML format before trying xlrd
-        with open(self.file_path, 'rb') as f:
-            header = f.read(20)  # Read enough to check XML declaration
 
         if header.startswith(b'<?xml'):
             # Parse as Excel XML Spreadsheet
@@ -76,13 +182,14 @@ class ExcelPaymentParser:
                 ws_xlsx.cell(row=r + 1, column=c + 1).value = sheet_xls.cell_value(r, c)
         return ws_xlsx
 
-    def extract_kazpost_data(self):
+    def iter_kazpost_rows(self):
         """
         Извлекает данные из листа openpyxl (ТОЛЬКО xlsx-совместимый sheet).
-        Возвращает список словарей: № лицевого счета, дата, сумма платежа, № операции.
+        Построчно отдает словари: № лицевого счета, дата, сумма платежа, № операции.
         """
 
         sheet = self.sheet
+        stats = self._begin_phase("extract_kazpost")
         # 1. Ищем строку заголовка по "№ п/п"
         header_row_idx = None
         for idx, row in enumerate(sheet.iter_rows(values_only=True), start=1):
@@ -90,7 +197,9 @@ class ExcelPaymentParser:
                 header_row_idx = idx
                 break
         if not header_row_idx:
-            return []
+            stats.skip("header_not_found")
+            self._end_phase(stats)
+            return
 
         # 2. Находим индексы нужных столбцов
         headers_cells = list(sheet[header_row_idx])
@@ -115,9 +224,10 @@ class ExcelPaymentParser:
                 break
 
         # 4. Собираем данные
-        results = []
         for row in sheet.iter_rows(min_row=header_row_idx + 1, values_only=True):
+            stats.rows_scanned += 1
             if not row:
+                stats.skip("empty_row")
                 continue
 
             account = row[account_col - 1] if account_col and len(row) >= account_col else None
@@ -125,7 +235,11 @@ class ExcelPaymentParser:
             operation = row[operation_col - 1] if operation_col and len(row) >= operation_col else None
 
             # Пропускаем строки без счета/суммы или с "Итого"
-            if not account or not amount or "Итого" in str(amount):
+            if not account or not amount:
+                stats.skip("missing_fields")
+                continue
+            if "Итого" in str(amount):
+                stats.skip("total_row")
                 continue
 
             # Форматируем лицевой счет
@@ -142,19 +256,20 @@ class ExcelPaymentParser:
             if operation is not None:
                 op_str = str(int(operation)) if isinstance(operation, float) else str(operation)
 
-            results.append({
-                "Date": document_date,
-                "Account": acc_str,
-                "PaymentID": op_str,
-                "Amount": amount_f
-            })
+            stats.rows_accepted += 1
+            with stats.pause():
+                yield {
+                    "Date": document_date,
+                    "Account": acc_str,
+                    "PaymentID": op_str,
+                    "Amount": amount_f
+                }
 
-        print(results)
-        return results
+        self._end_phase(stats)
 
-    def extract_kaspi_data(self):
+    def iter_kaspi_rows(self):
         """
-        Парсит отчет Kaspi (лист 'Данные') и возвращает список словарей:
+        Парсит отчет Kaspi (лист 'Данные') и построчно отдает словари:
         - 'Дата' (строка как в файле)
         - 'Идентификатор платежа' (строка)
         - 'Лицевой счет' (строка)
@@ -162,6 +277,7 @@ class ExcelPaymentParser:
         """
 
         sheet = self.sheet
+        stats = self._begin_phase("extract_kaspi")
         # Найти строку заголовков колонок
         header_row_idx = None
         for i, row in enumerate(sheet.iter_rows(values_only=True), start=1):
@@ -173,7 +289,9 @@ class ExcelPaymentParser:
                 break
 
         if not header_row_idx:
-            return []
+            stats.skip("header_not_found")
+            self._end_phase(stats)
+            return
 
         # Индексы колонок по ожидаемым именам
         header_cells = list(sheet.iter_rows(min_row=header_row_idx, max_row=header_row_idx, values_only=True))[0]
@@ -193,12 +311,15 @@ class ExcelPaymentParser:
 
         # Проверка, что все нужные колонки найдены
         if not {"date", "payment_id", "account", "amount"}.issubset(col_map.keys()):
-            return []
+            stats.skip("columns_not_found")
+            self._end_phase(stats)
+            return
 
-        results = []
         # Данные начинаются со следующей строки
         for row in sheet.iter_rows(min_row=header_row_idx + 1, values_only=True):
+            stats.rows_scanned += 1
             if not row:
+                stats.skip("empty_row")
                 continue
             # Остановка при встрече блока итогов
             first_cell = str(row[0]).strip() if row[0] is not None else ""
@@ -212,6 +333,7 @@ class ExcelPaymentParser:
 
             # Пропускаем пустые строки
             if acc_val in (None, "") or amt_val in (None, "") or date_val in (None, ""):
+                stats.skip("missing_fields")
                 continue
 
             # Приведение типов
@@ -231,20 +353,22 @@ class ExcelPaymentParser:
             try:
                 amount_out = float(amt_val)
             except:
+                stats.skip("invalid_amount")
                 continue
 
-            results.append({
-                "Date": date_out,
-                "Account": account_out,
-                "PaymentID": payment_id_out,
-                "Amount": amount_out
-            })
-        print(results)
-        return results
-
-    def extract_halyk_data(self):
+            stats.rows_accepted += 1
+            with stats.pause():
+                yield {
+                    "Date": date_out,
+                    "Account": account_out,
+                    "PaymentID": payment_id_out,
+                    "Amount": amount_out
+                }
+        self._end_phase(stats)
+
+    def iter_halyk_rows(self):
         """
-        Парсит отчет Halyk и возвращает список словарей:
+        Парсит отчет Halyk и построчно отдает словари:
         - 'Дата' (строка)
         - 'Идентификатор платежа' (строка)
         - 'Лицевой счет' (строка)
@@ -252,6 +376,7 @@ class ExcelPaymentParser:
         """
 
         sheet = self.sheet
+        stats = self._begin_phase("extract_halyk")
         # Найти строку заголовков колонок
         header_row_idx = None
         for i, row in enumerate(sheet.iter_rows(values_only=True), start=1):
@@ -264,7 +389,9 @@ class ExcelPaymentParser:
                 break
 
         if not header_row_idx:
-            return []
+            stats.skip("header_not_found")
+            self._end_phase(stats)
+            return
 
         # Индексы колонок по ожидаемым именам
         header_cells = list(sheet.iter_rows(min_row=header_row_idx, max_row=header_row_idx, values_only=True))[0]
@@ -284,12 +411,15 @@ class ExcelPaymentParser:
 
         # Проверка, что все нужные колонки найдены
         if not {"date", "payment_id", "account", "amount"}.issubset(col_map.keys()):
-            return []
+            stats.skip("columns_not_found")
+            self._end_phase(stats)
+            return
 
-        results = []
         # Данные начинаются со следующей строки
         for row in sheet.iter_rows(min_row=header_row_idx + 1, values_only=True):
+            stats.rows_scanned += 1
             if not row:
+                stats.skip("empty_row")
                 continue
 
             # Остановка при встрече блока итогов
@@ -304,6 +434,7 @@ class ExcelPaymentParser:
 
             # Пропускаем пустые строки
             if acc_val in (None, "") or amt_val in (None, "") or date_val in (None, ""):
+                stats.skip("missing_fields")
                 continue
 
             # Приведение типов
@@ -334,19 +465,22 @@ class ExcelPaymentParser:
             try:
                 amount_out = float(amt_val)
             except:
+                stats.skip("invalid_amount")
                 continue
 
-            results.append({
-                "Date": date_out,
-                "Account": account_out,
-                "PaymentID": payment_id_out,
-                "Amount": amount_out
-            })
-        print(results)
-        return results
-
-    def extract_bcc_data(self):
+            stats.rows_accepted += 1
+            with stats.pause():
+                yield {
+                    "Date": date_out,
+                    "Account": account_out,
+                    "PaymentID": payment_id_out,
+                    "Amount": amount_out
+                }
+        self._end_phase(stats)
+
+    def iter_bcc_rows(self):
         sheet = self.sheet
+        stats = self._begin_phase("extract_bcc")
 
         # Найти строку заголовков колонок
         header_row_idx = None
@@ -361,7 +495,9 @@ class ExcelPaymentParser:
                 break
 
         if not header_row_idx:
-            return []
+            stats.skip("header_not_found")
+            self._end_phase(stats)
+            return
 
         # Индексы колонок по ожидаемым именам
         header_cells = list(sheet.iter_rows(min_row=header_row_idx, max_row=header_row_idx, values_only=True))[0]
@@ -381,12 +517,15 @@ class ExcelPaymentParser:
 
         # Проверка, что все нужные колонки найдены
         if not {"date", "payment_id", "account", "amount"}.issubset(col_map.keys()):
-            return []
+            stats.skip("columns_not_found")
+            self._end_phase(stats)
+            return
 
-        results = []
         # Данные начинаются со следующей строки
         for row in sheet.iter_rows(min_row=header_row_idx + 1, values_only=True):
+            stats.rows_scanned += 1
             if not row:
+                stats.skip("empty_row")
                 continue
 
             # Остановка при встрече строки "ИТОГО:"
@@ -401,6 +540,7 @@ class ExcelPaymentParser:
 
             # Пропускаем пустые строки
             if acc_val in (None, "") or amt_val in (None, "") or date_val in (None, ""):
+                stats.skip("missing_fields")
                 continue
 
             # Приведение типов
@@ -435,14 +575,29 @@ class ExcelPaymentParser:
                 else:
                     amount_out = float(amt_val)
             except:
+                stats.skip("invalid_amount")
                 continue
 
-            results.append({
-                "Date": date_out,
-                "Account": account_out,
-                "PaymentID": payment_id_out,
-                "Amount": amount_out
-            })
-        print(results)
-        return results
+            stats.rows_accepted += 1
+            with stats.pause():
+                yield {
+                    "Date": date_out,
+                    "Account": account_out,
+                    "PaymentID": payment_id_out,
+                    "Amount": amount_out
+                }
+        self._end_phase(stats)
+
+    # Списочные варианты для кода, которому нужен весь результат сразу;
+    # /payments/parse потребляет iter_*_rows построчно (apps/paymets/pipeline.py)
+    def extract_kazpost_data(self):
+        return list(self.iter_kazpost_rows())
+
+    def extract_kaspi_data(self):
+        return list(self.iter_kaspi_rows())
 
+    def extract_halyk_data(self):
+        return list(self.iter_halyk_rows())
+
+    def extract_bcc_data(self):
+        return list(self.iter_bcc_rows())
@@ -0,0 +1,99 @@
+# apps/paymets/pipeline.py
+"""
+Конвейер загрузки выписки: разбор и нормализация строк идут в фоновом потоке
+и складываются пачками в ограниченную очередь, а поток запроса забирает пачки
+и пишет их в БД. Разбор следующей пачки идет, пока предыдущая вставляется,
+а в памяти одновременно не больше max_batches готовых пачек: если запись отстает,
+поток разбора ждет (backpressure).
+
+Запись остается в потоке запроса: соединения Django привязаны к потоку,
+и так вся загрузка выполняется в одной транзакции запроса.
+Функции разбора не должны обращаться к БД.
+
+Время фонового потока делится на фазы: parse (получение строк из rows),
+normalize и backpressure (ожидание места в очереди) — так медленная запись
+не выглядит как медленный разбор.
+"""
+import queue
+import threading
+import time
+
+_DONE = object()
+_PUT_TIMEOUT = 0.1
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def pipelined_batches(rows, normalize, batch_size: int, max_batches: int, observe=None):
+    """
+    Генератор пачек normalize(row) по batch_size элементов (None пропускается).
+    rows и normalize выполняются в фоновом потоке; исключение оттуда
+    пробрасывается в вызывающий поток. Если потребитель прервал обход,
+    фоновый поток останавливается; чтобы дождаться этого сразу, а не при сборке
+    мусора генератора, оборачивайте обход в contextlib.closing().
+    observe(phase, seconds) вызывается из фонового потока по его завершении
+    с суммарным временем фаз parse, normalize и backpressure.
+    """
+    batches = queue.Queue(maxsize=max_batches)
+    stop = threading.Event()
+    timings = {"parse": 0.0, "normalize": 0.0, "backpressure": 0.0}
+
+    def put(item) -> bool:
+        started = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=_PUT_TIMEOUT)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            timings["backpressure"] += time.perf_counter() - started
+
+    def produce():
+        try:
+            batch = []
+            iterator = iter(rows)
+            while True:
+                started = time.perf_counter()
+                row = next(iterator, _DONE)
+                parsed = time.perf_counter()
+                timings["parse"] += parsed - started
+                if row is _DONE:
+                    break
+                item = normalize(row)
+                timings["normalize"] += time.perf_counter() - parsed
+                if item is None:
+                    continue
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch and not put(batch):
+                return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            if observe is not None:
+                for phase, seconds in timings.items():
+                    observe(phase, seconds)
+
+    producer = threading.Thread(target=produce, name="parse-producer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = batches.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        producer.join()
@@ -2,7 +2,7 @@
 from ninja import Schema, ModelSchema
 from typing import Optional
 from ninja.files import UploadedFile  # If needed, but likely removable; see notes
-from .models import Bank  # Import the actual model class
+from .models import Bank, ImportBatch  # Import the actual model class
 
 class BankIn(Schema):
     email: str
@@ -19,4 +19,9 @@ class BankUpdate(Schema):
 
 class ParseIn(Schema):
     email: str
-    # file: UploadedFile  # Remove this; file uploads are handled via function params (Form/File), not JSON schemas
\ No newline at end of file
+    # file: UploadedFile  # Remove this; file uploads are handled via function params (Form/File), not JSON schemas
+
+class ImportBatchOut(ModelSchema):
+    class Config:
+        model = ImportBatch
+        model_fields = ['id', 'file_name', 'bank', 'row_count', 'checksum', 'created_at']
@@ -0,0 +1,22 @@
+# apps/paymets/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bank_cache, invalidate_account_history
+from .models import Bank, Payment, PaymentArchive
+
+
+@receiver([post_save, post_delete], sender=Bank)
+def invalidate_bank_cache(sender, **kwargs):
+    # Сбрасываем кэш только после коммита, чтобы другие воркеры не перечитали старые данные
+    transaction.on_commit(bank_cache.invalidate)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=PaymentArchive)
+def invalidate_account_history_cache(sender, instance, **kwargs):
+    # Правки по одной записи (админка); загрузки и откаты сбрасывают кэш сами.
+    # post_delete не слушаем: приемник отключил бы быстрое удаление по CASCADE
+    # (откат загрузки, удаление банка) — удаление в админке обрабатывает PaymentAdmin
+    invalidate_account_history([instance.account_id])
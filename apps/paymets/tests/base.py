@@ -0,0 +1,49 @@
+# apps/paymets/tests/base.py
+"""Общие данные и помощники тестов приложения платежей."""
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+PASSWORD = "test-pass-123"
+
+# Локальный кэш вместо файлового: штампы версий и лимиты не переживают тест;
+# свой каталог слотов разбора, чтобы не пересекаться с запущенным сервером
+TEST_SETTINGS = {
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    "PAYMENTS_PARSE_USER_RATE": "",
+    "PAYMENTS_PARSE_GLOBAL_RATE": "",
+    "PAYMENTS_PARSE_LOCK_DIR": tempfile.mkdtemp(prefix="zheu_parse_slots_"),
+}
+
+
+def kaspi_xml(rows) -> bytes:
+    """Выписка Kaspi (Excel XML) из строк (дата, id платежа, лицевой счет, сумма)."""
+    def cell(value):
+        kind = "Number" if isinstance(value, (int, float)) else "String"
+        return f'<Cell><Data ss:Type="{kind}">{value}</Data></Cell>'
+
+    table = [["Дата", "Идентификатор платежа", "Лицевой счет", "Сумма платежа"], *rows, ["Общая сумма"]]
+    return (
+        '<?xml version="1.0"?>'
+        '<Workbook xmlns="urn:schemas-microsoft-com:office:spreadsheet" '
+        'xmlns:ss="urn:schemas-microsoft-com:office:spreadsheet">'
+        '<Worksheet ss:Name="Данные"><Table>'
+        + "".join("<Row>" + "".join(cell(value) for value in row) + "</Row>" for row in table)
+        + "</Table></Worksheet></Workbook>"
+    ).encode("utf-8")
+
+
+class ApiTestMixin:
+    def auth_headers(self, user) -> dict:
+        response = self.client.post(
+            "/api/token/pair", {"username": user.username, "password": PASSWORD}, content_type="application/json"
+        )
+        return {"HTTP_AUTHORIZATION": f"Bearer {response.json()['access']}"}
+
+    def post_statement(self, headers, rows, email="imex@kaspi.kz"):
+        """POST /payments/parse с выпиской Kaspi из kaspi_xml(rows)."""
+        return self.client.post(
+            "/api/payments/parse",
+            {"email": email, "file": SimpleUploadedFile("kaspi.xml", kaspi_xml(rows))},
+            **headers,
+        )
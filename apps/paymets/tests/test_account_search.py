@@ -0,0 +1,70 @@
+# apps/paymets/tests/test_account_search.py
+from itertools import count
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..cache import bank_cache
+from ..models import Account, AccountNgram, Bank, account_ngrams
+from .base import PASSWORD, TEST_SETTINGS, ApiTestMixin
+
+NUMBERS = ["1000", "1009", "101", "0999", "12309234", "551234"]
+
+
+class AccountSearchTests(TestCase):
+    def setUp(self):
+        self.ids = Account.objects.resolve(NUMBERS)
+
+    def numbers(self, queryset):
+        return sorted(queryset.values_list("number", flat=True))
+
+    def test_resolve_fills_ngram_table(self):
+        self.assertEqual(account_ngrams("12345"), {"123", "234", "345"})
+        self.assertEqual(
+            set(AccountNgram.objects.filter(account_id=self.ids["551234"]).values_list("gram", flat=True)),
+            account_ngrams("551234"),
+        )
+        # Повторная загрузка тех же счетов не дублирует ни счета, ни триграммы
+        grams = AccountNgram.objects.count()
+        self.assertEqual(Account.objects.resolve(NUMBERS), self.ids)
+        self.assertEqual(AccountNgram.objects.count(), grams)
+
+    def test_prefix(self):
+        self.assertEqual(self.numbers(Account.objects.search_prefix("100")), ["1000", "1009"])
+        self.assertEqual(self.numbers(Account.objects.search_prefix("10")), ["1000", "1009", "101"])
+        self.assertEqual(self.numbers(Account.objects.search_prefix("09")), ["0999"])
+
+    def test_contains(self):
+        # У 12309234 есть обе триграммы запроса, но не подряд — отсекается проверкой contains
+        self.assertEqual(self.numbers(Account.objects.search_contains("1234")), ["551234"])
+        self.assertEqual(self.numbers(Account.objects.search_contains("309")), ["12309234"])
+        with self.assertRaises(ValueError):
+            Account.objects.search_contains("12")
+
+
+@override_settings(**TEST_SETTINGS)
+class AccountSearchApiTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        Bank.objects.create(name="Kaspi", email="imex@kaspi.kz")
+        bank_cache.invalidate()
+        payment_ids = count(1)
+        self.headers = self.auth_headers(User.objects.create_user("search", password=PASSWORD))
+        rows = [("2025-09-01", next(payment_ids), number, 10) for number in ("7001", "7002", "7003", "8700")]
+        self.post_statement(self.headers, rows)
+        # Счета чужого пользователя в выдачу не попадают
+        other = self.auth_headers(User.objects.create_user("other", password=PASSWORD))
+        self.post_statement(other, [("2025-09-01", next(payment_ids), "7004", 10)])
+
+    def search(self, **params):
+        return self.client.get("/api/payments/accounts/search", params, **self.headers)
+
+    def test_prefix_and_contains(self):
+        self.assertEqual(self.search(q="70").json(), {"accounts": ["7001", "7002", "7003"], "truncated": False})
+        self.assertEqual(self.search(q="700", mode="contains").json()["accounts"], ["7001", "7002", "7003", "8700"])
+        self.assertEqual(self.search(q="870", mode="contains").json()["accounts"], ["8700"])
+
+    def test_limit_and_short_contains(self):
+        self.assertEqual(self.search(q="7", limit=2).json(), {"accounts": ["7001", "7002"], "truncated": True})
+        self.assertEqual(self.search(q="70", mode="contains").status_code, 400)
@@ -0,0 +1,67 @@
+# apps/paymets/tests/test_admin.py
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from ..models import Account, Bank, ImportBatch, Payment, PaymentTombstone, SyncCounter
+from .base import TEST_SETTINGS
+
+
+@override_settings(**TEST_SETTINGS)
+class AdminDeleteTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", password="admin-pass")
+        self.client.force_login(self.admin)
+        self.bank = Bank.objects.create(name="Kaspi", email="imex@kaspi.kz")
+        self.account = Account.objects.create(number="42")
+
+    def create_batch(self, rows: int) -> ImportBatch:
+        batch = ImportBatch.objects.create(file_name="a", bank=self.bank, user=self.admin, row_count=rows)
+        for index in range(rows):
+            Payment.objects.create(
+                date=date(2025, 9, 1), account=self.account, amount_tiyn=100, payment_id=str(index),
+                source=self.bank, added_by=self.admin, batch=batch,
+            )
+        batch.sync_seq = SyncCounter.next_value()
+        batch.save()
+        return batch
+
+    def test_rollback_action_writes_tombstones(self):
+        batch = self.create_batch(3)
+        payment_ids = list(Payment.objects.filter(batch=batch).values_list("id", flat=True))
+        response = self.client.post(
+            "/admin/paymets/importbatch/",
+            {"action": "rollback_batches", "_selected_action": [batch.id]},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(ImportBatch.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(sorted(PaymentTombstone.objects.values_list("payment_pk", flat=True)), payment_ids)
+
+    def test_batch_cannot_be_deleted_directly(self):
+        batch = self.create_batch(2)
+        response = self.client.get(f"/admin/paymets/importbatch/{batch.id}/delete/")
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get("/admin/paymets/importbatch/")
+        actions = [name for name, _ in response.context["action_form"].fields["action"].choices]
+        self.assertEqual(actions, ["", "rollback_batches"])
+        self.assertEqual(Payment.objects.count(), 2)
+
+    def test_bank_with_payments_cannot_be_deleted(self):
+        self.create_batch(1)
+        response = self.client.post(f"/admin/paymets/bank/{self.bank.id}/delete/", {"post": "yes"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Payment.objects.count(), 1)
+
+        empty = Bank.objects.create(name="БЦК Банк", email="info@bcc.kz")
+        response = self.client.post(f"/admin/paymets/bank/{empty.id}/delete/", {"post": "yes"})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Bank.objects.filter(id=empty.id).exists())
+
+    def test_payment_delete_writes_tombstone(self):
+        batch = self.create_batch(2)
+        payment = Payment.objects.filter(batch=batch).first()
+        response = self.client.post(f"/admin/paymets/payment/{payment.id}/delete/", {"post": "yes"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(PaymentTombstone.objects.values_list("payment_pk", flat=True)), [payment.id])
@@ -0,0 +1,56 @@
+# apps/paymets/tests/test_bank_cache.py
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase, override_settings
+
+from ..cache import BankCache, bank_cache, get_bank_or_404
+from ..models import Bank
+from .base import PASSWORD, TEST_SETTINGS, ApiTestMixin
+
+
+@override_settings(**TEST_SETTINGS)
+class BankCacheTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.kaspi = Bank.objects.create(name="Kaspi", email="imex@kaspi.kz")
+        bank_cache.invalidate()
+
+    def test_reads_without_queries_until_invalidated(self):
+        bank_cache.all()
+        with self.assertNumQueries(0):
+            self.assertEqual(bank_cache.get(self.kaspi.id), self.kaspi)
+            self.assertEqual(bank_cache.get_by_email("imex@kaspi.kz"), self.kaspi)
+            self.assertEqual(get_bank_or_404(email="imex@kaspi.kz"), self.kaspi)
+            with self.assertRaises(Http404):
+                get_bank_or_404(bank_id=self.kaspi.id + 1)
+
+    def test_change_invalidates_other_workers_after_commit(self):
+        worker = BankCache()  # Кэш другого воркера: видит только штамп версии в общем кэше
+        self.assertEqual([bank.name for bank in worker.all()], ["Kaspi"])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.kaspi.name = "Kaspi Bank"
+            self.kaspi.save()
+        # До коммита штамп не меняется — иначе воркер перечитал бы старую строку
+        with self.assertNumQueries(0):
+            self.assertEqual([bank.name for bank in worker.all()], ["Kaspi"])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual([bank.name for bank in worker.all()], ["Kaspi Bank"])
+
+    def test_api_create_and_delete_refresh_list(self):
+        headers = self.auth_headers(User.objects.create_user("banks", password=PASSWORD))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/payments/banks", {"name": "Халык Банк", "email": "ensemble@halykbank.kz"},
+                content_type="application/json", **headers,
+            )
+        bank_id = response.json()["id"]
+        response = self.client.get("/api/payments/banks", **headers)
+        self.assertEqual([bank["id"] for bank in response.json()], [self.kaspi.id, bank_id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/payments/banks/{bank_id}", **headers)
+        self.assertEqual(self.client.get(f"/api/payments/banks/{bank_id}", **headers).status_code, 404)
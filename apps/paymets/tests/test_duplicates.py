@@ -0,0 +1,73 @@
+# apps/paymets/tests/test_duplicates.py
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..duplicates import duplicate_groups
+from ..models import Account, Bank, Payment, payment_fingerprint
+from .base import PASSWORD, TEST_SETTINGS, ApiTestMixin
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_normalization(self):
+        day = date(2025, 9, 1)
+        fingerprint = payment_fingerprint("00123", 15050, day, " 0AB77 ")
+        self.assertEqual(fingerprint, payment_fingerprint("123", 15050, day, "ab77"))
+        self.assertNotEqual(fingerprint, payment_fingerprint("123", 15051, day, "ab77"))
+        self.assertNotEqual(fingerprint, payment_fingerprint("123", 15050, date(2025, 9, 2), "ab77"))
+        self.assertEqual(payment_fingerprint("123", 100, day, None), payment_fingerprint("123", 100, day, ""))
+        self.assertTrue(-2 ** 63 <= fingerprint < 2 ** 63)
+
+
+@override_settings(**TEST_SETTINGS)
+class DuplicateClustersTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("duplicates", password=PASSWORD)
+        self.kazpost = Bank.objects.create(name="Казпочта", email="reports@kazpost.kz")
+        self.halyk = Bank.objects.create(name="Халык Банк", email="ensemble@halykbank.kz")
+
+    def pay(self, bank, number="100", amount_tiyn=5000, day=date(2025, 9, 1), payment_id="77", user=None):
+        return Payment.objects.create(
+            date=day, account=Account.objects.get_or_create(number=number)[0], amount_tiyn=amount_tiyn,
+            payment_id=payment_id, source=bank, added_by=user or self.user,
+        )
+
+    def test_groups_need_two_banks(self):
+        first = self.pay(self.kazpost)
+        second = self.pay(self.halyk, number="0100", payment_id="077")  # Тот же платеж в другой записи
+        self.assertEqual(first.fingerprint, second.fingerprint)
+        self.pay(self.kazpost, number="200")
+        self.pay(self.kazpost, number="200")  # Повтор в одном банке — не межбанковый дубль
+        other = User.objects.create_user("other")
+        self.pay(self.halyk, number="300", user=other)
+        self.pay(self.kazpost, number="300", user=self.user)  # Один отпечаток, но разные пользователи
+
+        groups = list(duplicate_groups(Payment.objects.all()))
+        self.assertEqual(
+            groups, [{"added_by": self.user.id, "fingerprint": first.fingerprint, "banks": 2, "payments": 2}]
+        )
+
+    def test_api_returns_clusters(self):
+        first = self.pay(self.kazpost, day=date(2025, 9, 1))
+        second = self.pay(self.halyk, day=date(2025, 9, 1))
+        self.pay(self.kazpost, number="200", day=date(2025, 10, 1))
+        self.pay(self.halyk, number="200", day=date(2025, 10, 1))
+
+        headers = self.auth_headers(self.user)
+        response = self.client.get("/api/payments/duplicates?end_date=2025-09-30", **headers)
+        data = response.json()
+        self.assertEqual(data["total"], 1)
+        self.assertEqual(data["clusters"][0]["bank_ids"], sorted([self.kazpost.id, self.halyk.id]))
+        self.assertEqual([p["id"] for p in data["clusters"][0]["payments"]], [first.id, second.id])
+        self.assertEqual(self.client.get("/api/payments/duplicates", **headers).json()["total"], 2)
+
+    def test_find_duplicates_command(self):
+        self.pay(self.kazpost)
+        self.pay(self.halyk)
+        out = StringIO()
+        call_command("find_duplicates", user="duplicates", stdout=out)
+        self.assertIn("Групп дублей: 1", out.getvalue())
+        self.assertIn("банков: 2, платежей: 2", out.getvalue())
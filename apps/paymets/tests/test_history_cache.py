@@ -0,0 +1,69 @@
+# apps/paymets/tests/test_history_cache.py
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from zheu_backend.db_router import PrimaryReplicaRouter
+
+from .. import api
+from ..cache import account_history_cache, bank_cache
+from ..models import Bank, Payment, PaymentArchive
+from .base import PASSWORD, TEST_SETTINGS, ApiTestMixin
+
+
+@override_settings(**TEST_SETTINGS)
+class AccountHistoryCacheTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        account_history_cache.clear()
+        self.user = User.objects.create_user("history", password=PASSWORD)
+        Bank.objects.create(name="Kaspi", email="imex@kaspi.kz")
+        bank_cache.invalidate()
+        self.headers = self.auth_headers(self.user)
+        self.payment_ids = count(1)
+
+    def upload(self, account: int, rows: int) -> int:
+        # Штампы версий пишутся в on_commit — в TestCase их нужно выполнить явно
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_statement(
+                self.headers, [("2025-09-01", next(self.payment_ids), account, 100) for _ in range(rows)]
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["batch_id"]
+
+    def history_count(self, account: int) -> int:
+        response = self.client.get(f"/api/payments/accounts/{account}/history", **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["totals"]["count"]
+
+    def test_upload_and_rollback_invalidate_only_touched_account(self):
+        self.upload(1000, 2)
+        self.upload(2000, 1)
+        with mock.patch.object(api, "_account_history", wraps=api._account_history) as compute:
+            self.assertEqual(self.history_count(1000), 2)
+            self.assertEqual(self.history_count(1000), 2)
+            self.assertEqual(self.history_count(2000), 1)
+            self.assertEqual(compute.call_count, 2)
+
+            batch_id = self.upload(1000, 3)
+            self.assertEqual(self.history_count(1000), 5)
+            self.assertEqual(self.history_count(2000), 1)
+            self.assertEqual(compute.call_count, 3)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(f"/api/payments/batches/{batch_id}", **self.headers)
+            self.assertEqual(self.history_count(1000), 2)
+            self.assertEqual(compute.call_count, 4)
+
+    def test_history_is_computed_on_primary(self):
+        self.upload(1000, 2)
+
+        def db_for_read(router, model, **hints):
+            # Реплики в тестах нет: чтение платежей с нее упало бы с ConnectionDoesNotExist
+            return "replica" if model in (Payment, PaymentArchive) else None
+
+        with mock.patch.object(PrimaryReplicaRouter, "db_for_read", db_for_read):
+            self.assertEqual(self.history_count(1000), 2)
@@ -0,0 +1,31 @@
+# apps/paymets/tests/test_importtime.py
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from ..management.commands.importtime_report import Command
+
+
+class ImportTimeReportTests(SimpleTestCase):
+    def test_parser_stack_is_not_loaded_at_startup(self):
+        out = StringIO()
+        call_command("importtime_report", top=3, stdout=out)
+        self.assertIn("URLconf (zheu_backend.urls)", out.getvalue())
+        self.assertTrue(out.getvalue().rstrip().endswith("OK"))
+
+    def test_forbidden_module_fails(self):
+        with self.assertRaisesMessage(CommandError, "при старте загружены тяжелые модули: ninja"):
+            call_command("importtime_report", forbid=["ninja"], stdout=StringIO())
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   zipimport\n"
+            "import time:      2500 |      40000 | zheu_backend.urls\n"
+            "some other output\n"
+        )
+        self.assertEqual(
+            Command()._parse_importtime(stderr),
+            {"zipimport": (120, 120), "zheu_backend.urls": (2500, 40000)},
+        )
@@ -0,0 +1,80 @@
+# apps/paymets/tests/test_parser.py
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+from openpyxl import Workbook
+
+from zheu_backend import metrics
+
+from ..parser_exсel import ExcelPaymentParser
+from .base import kaspi_xml
+
+ROWS = [
+    ("2025-09-01", 1, 1000, 150.5),
+    ("2025-09-01", 2, "", 10),  # Без лицевого счета
+    ("2025-09-02", 3, 1001, "abc"),  # Сумма не число
+    ("2025-09-02", 4, 1002, 20),
+    ("2025-09-03", 5, 1000, 30),
+]
+
+
+class ParserProfileTests(SimpleTestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(kaspi_xml(ROWS))
+        self.addCleanup(os.unlink, self.path)
+
+    def test_hooks_receive_phase_stats(self):
+        phases = []
+        parser = ExcelPaymentParser(self.path, hooks=[phases.append])
+        rows = list(parser.iter_kaspi_rows())
+        parser.close()
+
+        self.assertEqual([row["Account"] for row in rows], ["1000", "1002", "1000"])
+        self.assertEqual([stats.name for stats in phases], ["load", "extract_kaspi"])
+        self.assertEqual(set(parser.profile), {"load", "extract_kaspi"})
+        self.assertEqual(phases[0].bytes_read, os.path.getsize(self.path))
+        extract = parser.profile["extract_kaspi"].as_dict()
+        self.assertEqual(extract["rows_accepted"], 3)
+        self.assertEqual(extract["rows_skipped"], {"missing_fields": 1, "invalid_amount": 1})
+
+    def test_consumer_time_is_not_counted(self):
+        parser = ExcelPaymentParser(self.path)
+        for _ in parser.iter_kaspi_rows():
+            time.sleep(0.05)  # Медленный потребитель (вставка в БД)
+        parser.close()
+        self.assertLess(parser.profile["extract_kaspi"].elapsed, 0.05)
+
+    def test_xlsx_without_extension(self):
+        # Загрузка сохраняется во временный файл без расширения — xlsx узнается по сигнатуре ZIP
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Дата", "Идентификатор платежа", "Лицевой счет", "Сумма платежа"])
+        sheet.append(["2025-09-01", 7, 1000, 150.5])
+        sheet.append(["Общая сумма"])
+        workbook.save(self.path)
+
+        parser = ExcelPaymentParser(self.path)
+        rows = list(parser.iter_kaspi_rows())
+        parser.close()
+        self.assertEqual(rows, [{"Date": "2025-09-01", "Account": "1000", "PaymentID": "7", "Amount": 150.5}])
+
+    def test_missing_header_is_reported(self):
+        phases = []
+        parser = ExcelPaymentParser(self.path, hooks=[phases.append])
+        self.assertEqual(list(parser.iter_kazpost_rows()), [])
+        self.assertEqual(dict(phases[-1].skipped), {"header_not_found": 1})
+
+    def test_metrics_hook_counts_rows(self):
+        def value(outcome):
+            prefix = f'payments_parse_rows_total{{phase="extract_kaspi",outcome="{outcome}"}} '
+            lines = [line for line in metrics.PARSE_ROWS.render() if line.startswith(prefix)]
+            return int(lines[0][len(prefix):]) if lines else 0
+
+        before = value("accepted"), value("skipped:invalid_amount")
+        parser = ExcelPaymentParser(self.path, hooks=[metrics.record_parse_stats])
+        list(parser.iter_kaspi_rows())
+        self.assertEqual((value("accepted") - before[0], value("skipped:invalid_amount") - before[1]), (3, 1))
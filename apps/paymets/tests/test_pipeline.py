@@ -0,0 +1,102 @@
+# apps/paymets/tests/test_pipeline.py
+import threading
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from zheu_backend import metrics
+
+from ..cache import bank_cache
+from ..models import AccountManager, Bank, Payment
+from ..parser_exсel import ExcelPaymentParser
+from ..pipeline import pipelined_batches
+from .base import PASSWORD, TEST_SETTINGS, ApiTestMixin
+
+
+def producer_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "parse-producer"]
+
+
+class PipelinedBatchesTests(SimpleTestCase):
+    def test_batches_skip_none(self):
+        batches = list(pipelined_batches(range(10), lambda row: None if row % 3 == 0 else row, 4, 2))
+        self.assertEqual(batches, [[1, 2, 4, 5], [7, 8]])
+
+    def test_producer_error_is_reraised(self):
+        def normalize(row):
+            if row == 5:
+                raise ValueError("bad row")
+            return row
+
+        with self.assertRaisesMessage(ValueError, "bad row"):
+            for _ in pipelined_batches(range(10), normalize, 2, 1):
+                pass
+        self.assertEqual(producer_threads(), [])
+
+    def test_early_exit_stops_producer(self):
+        produced = []
+
+        def rows():
+            for row in count():
+                produced.append(row)
+                yield row
+
+        batches = pipelined_batches(rows(), lambda row: row, 10, 1)
+        self.assertEqual(next(batches), list(range(10)))
+        # Бесконечный источник: если поток не остановится, close() зависнет на join
+        batches.close()
+        self.assertEqual(producer_threads(), [])
+        # Пачка у потребителя, одна в очереди и одна в ожидании места — дальше поток не читает
+        self.assertLessEqual(len(produced), 31)
+
+    def test_observe_reports_producer_phases(self):
+        observed = {}
+        list(pipelined_batches(range(5), lambda row: row, 2, 1, observe=observed.__setitem__))
+        self.assertEqual(set(observed), {"parse", "normalize", "backpressure"})
+
+
+@override_settings(**TEST_SETTINGS)
+class ParsePipelineTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("pipeline", password=PASSWORD)
+        Bank.objects.create(name="Kaspi", email="imex@kaspi.kz")
+        bank_cache.invalidate()
+        self.headers = self.auth_headers(self.user)
+        self.payment_ids = count(1)
+
+    def rows(self, total: int):
+        return [("2025-09-01", next(self.payment_ids), 1000 + index % 7, 10) for index in range(total)]
+
+    def test_insert_error_stops_producer_before_parser_close(self):
+        alive_at_close = []
+        close = ExcelPaymentParser.close
+
+        def recording_close(parser):
+            alive_at_close.append(producer_threads())
+            close(parser)
+
+        # Строк больше, чем пачек помещается в очередь: без остановки поток ждал бы места
+        with mock.patch.object(AccountManager, "resolve", side_effect=RuntimeError("insert failed")), \
+                mock.patch.object(ExcelPaymentParser, "close", recording_close):
+            with self.assertRaisesMessage(RuntimeError, "insert failed"):
+                self.post_statement(self.headers, self.rows(8000))
+        self.assertEqual(alive_at_close, [[]])
+        self.assertFalse(Payment.objects.exists())
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_insert_observed_once_per_upload(self):
+        def observed(phase):
+            prefix = f'payments_parse_phase_seconds_count{{phase="{phase}"}} '
+            lines = [line for line in metrics.PARSE_PHASE.render() if line.startswith(prefix)]
+            return int(lines[0][len(prefix):]) if lines else 0
+
+        before = {phase: observed(phase) for phase in ("parse", "normalize", "backpressure", "insert")}
+        response = self.post_statement(self.headers, self.rows(2500))
+        self.assertEqual(response.json()["added_payments"], 2500)
+        # Три пачки по INSERT_BATCH_SIZE, но в гистограмме по одному наблюдению на фазу
+        self.assertEqual({phase: observed(phase) - count for phase, count in before.items()},
+                         dict.fromkeys(before, 1))
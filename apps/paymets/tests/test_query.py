@@ -0,0 +1,60 @@
+# apps/paymets/tests/test_query.py
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import api
+from ..cache import bank_cache
+from ..models import Bank
+from .base import PASSWORD, TEST_SETTINGS, ApiTestMixin
+
+
+@override_settings(**TEST_SETTINGS)
+class BulkQueryTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user("query", password=PASSWORD)
+        Bank.objects.create(name="Kaspi", email="imex@kaspi.kz")
+        bank_cache.invalidate()
+        self.headers = self.auth_headers(user)
+        rows = [(f"2025-09-{1 + index % 20:02d}", index + 1, 1000 + index % 5, 100 + index) for index in range(60)]
+        self.assertEqual(self.post_statement(self.headers, rows).status_code, 200)
+
+    def query(self, **payload):
+        response = self.client.post(
+            "/api/payments/payments/query", payload, content_type="application/json", **self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        return response, list(response.streaming_content)
+
+    def test_ndjson_and_accounts_not_found(self):
+        response, chunks = self.query(account_numbers=["1000", "1003", "missing", "1003"])
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(response["X-Accounts-Not-Found"], "1")
+        payments = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        self.assertEqual(len(payments), 24)
+        self.assertEqual({payment["account_number"] for payment in payments}, {"1000", "1003"})
+        # Порядок внутри счета — по дате
+        dates = [payment["date"] for payment in payments if payment["account_number"] == "1000"]
+        self.assertEqual(dates, sorted(dates))
+
+    def test_date_filter(self):
+        _, chunks = self.query(account_numbers=["1000", "1001"], start_date="2025-09-10", end_date="2025-09-12")
+        payments = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        self.assertTrue(payments)
+        self.assertTrue(all("2025-09-10" <= payment["date"] <= "2025-09-12" for payment in payments))
+
+    def test_rows_are_streamed_in_chunks(self):
+        numbers = [str(1000 + index) for index in range(5)]
+        _, chunks = self.query(account_numbers=numbers)
+        self.assertEqual(len(chunks), 1)
+
+        with mock.patch.object(api, "QUERY_STREAM_CHUNK_BYTES", 1024):
+            _, small_chunks = self.query(account_numbers=numbers)
+        self.assertEqual(b"".join(small_chunks), b"".join(chunks))
+        self.assertGreater(len(small_chunks), 1)
+        self.assertLess(len(small_chunks), 60)
+        self.assertTrue(all(len(chunk) >= 1024 for chunk in small_chunks[:-1]))
@@ -0,0 +1,36 @@
+# apps/paymets/tests/test_rollback.py
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Account, Bank, ImportBatch, Payment, PaymentArchive, PaymentTombstone, SyncCounter
+
+class ImportBatchRollbackTests(TestCase):
+    def test_rollback_writes_tombstones(self):
+        user = User.objects.create_user("rollback")
+        bank = Bank.objects.create(name="Kaspi", email="imex@kaspi.kz")
+        account = Account.objects.create(number="42")
+        batch = ImportBatch.objects.create(file_name="a", bank=bank, user=user, sync_seq=SyncCounter.next_value())
+        fields = dict(date=date(2020, 1, 1), account=account, amount_tiyn=100, source=bank, added_by=user, batch=batch)
+        hot_ids = [Payment.objects.create(payment_id=str(index), **fields).id for index in range(5)]
+        archived_ids = [
+            PaymentArchive.objects.create(id=10_000 + index, added_at=timezone.now(), **fields).id
+            for index in range(2)
+        ]
+
+        self.assertEqual(batch.rollback(chunk_size=2), 7)
+
+        self.assertFalse(ImportBatch.objects.filter(id=batch.id).exists())
+        self.assertFalse(Payment.objects.filter(batch_id=batch.id).exists())
+        self.assertFalse(PaymentArchive.objects.filter(batch_id=batch.id).exists())
+        tombstones = list(PaymentTombstone.objects.order_by("id").values_list("payment_pk", "added_by_id", "sync_seq"))
+        self.assertEqual([pk for pk, _, _ in tombstones], hot_ids + archived_ids)
+        self.assertEqual({user_id for _, user_id, _ in tombstones}, {user.id})
+        # Каждая короткая транзакция отката — свой номер коммита в ленте, по возрастанию
+        seqs = [seq for _, _, seq in tombstones]
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(len(set(seqs)), 4)
+        self.assertGreater(seqs[0], batch.sync_seq)
+        self.assertEqual(SyncCounter.objects.get().value, seqs[-1])
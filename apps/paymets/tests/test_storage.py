@@ -0,0 +1,66 @@
+# apps/paymets/tests/test_storage.py
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+
+from .base import PASSWORD, TEST_SETTINGS, ApiTestMixin
+
+
+@override_settings(**TEST_SETTINGS)
+class CompactStorageMigrationTests(ApiTestMixin, TransactionTestCase):
+    """0004–0006: счета в справочнике Account и суммы в тиынах, туда и обратно."""
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return MigrationExecutor(connection).loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def test_round_trip_keeps_payments_output(self):
+        rows = [
+            (date(2025, 9, 1), "000123", Decimal("1234.56")),
+            (date(2025, 9, 2), "000123", Decimal("0.07")),
+            (date(2025, 9, 3), "777", Decimal("99999999.99")),
+        ]
+        user = User.objects.create_user("migration", password=PASSWORD)
+
+        old_apps = self.migrate([("paymets", "0003_sync_feed")])
+        bank = old_apps.get_model("paymets", "Bank").objects.create(name="Kaspi", email="imex@kaspi.kz")
+        OldPayment = old_apps.get_model("paymets", "Payment")
+        for index, (day, number, amount) in enumerate(rows):
+            OldPayment.objects.create(
+                date=day, account_number=number, amount=amount, payment_id=str(index),
+                source_id=bank.id, added_by_id=user.id,
+            )
+
+        new_apps = self.migrate([("paymets", "0006_compact_payment_storage")])
+        NewPayment = new_apps.get_model("paymets", "Payment")
+        self.assertEqual(new_apps.get_model("paymets", "Account").objects.count(), 2)
+        self.assertEqual(
+            sorted(NewPayment.objects.values_list("account__number", "amount_tiyn")),
+            [("000123", 7), ("000123", 123456), ("777", 9999999999)],
+        )
+
+        old_apps = self.migrate([("paymets", "0003_sync_feed")])
+        self.assertEqual(
+            sorted(old_apps.get_model("paymets", "Payment").objects.values_list("account_number", "amount")),
+            sorted((number, amount) for _, number, amount in rows),
+        )
+
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+        cache.clear()
+        response = self.client.get("/api/payments/payments?page_size=10", **self.auth_headers(user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(p["date"], p["account_number"], p["amount"]) for p in response.json()["payments"]],
+            [(day.isoformat(), number, str(amount)) for day, number, amount in reversed(rows)],
+        )
@@ -0,0 +1,83 @@
+# apps/paymets/tests/test_throttling.py
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+
+from .. import api
+from ..cache import bank_cache
+from ..models import AccountManager, Bank, Payment
+from .base import PASSWORD, TEST_SETTINGS, ApiTestMixin
+
+
+@override_settings(**TEST_SETTINGS, PAYMENTS_PARSE_RETRY_AFTER=7)
+class ParseAdmissionTests(ApiTestMixin, TransactionTestCase):
+    """Загрузки из разных потоков, как с разных воркеров: каждой нужна своя транзакция."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("throttle", password=PASSWORD)
+        Bank.objects.create(name="Kaspi", email="imex@kaspi.kz")
+        bank_cache.invalidate()
+        self.headers = self.auth_headers(self.user)
+
+    def rows(self, first_id: int):
+        return [("2025-09-01", first_id + index, 1000 + index, 10) for index in range(5)]
+
+    def test_concurrent_upload_gets_429_while_import_holds_write_lock(self):
+        inside, release = threading.Event(), threading.Event()
+        pipelined_batches = api.pipelined_batches
+
+        def held_batches(*args, **kwargs):
+            # Первая загрузка уже записала ImportBatch в своей транзакции и ждет здесь
+            inside.set()
+            release.wait(10)
+            return pipelined_batches(*args, **kwargs)
+
+        responses = []
+
+        def first_upload():
+            try:
+                responses.append(self.post_statement(self.headers, self.rows(1)))
+            finally:
+                connection.close()
+
+        with mock.patch.object(api, "pipelined_batches", held_batches):
+            thread = threading.Thread(target=first_upload)
+            thread.start()
+            try:
+                self.assertTrue(inside.wait(10))
+                started = time.monotonic()
+                response = self.post_statement(self.headers, self.rows(100))
+                elapsed = time.monotonic() - started
+            finally:
+                release.set()
+                thread.join()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "7")
+        # Отказ не ждет блокировку записи SQLite, которую держит первая загрузка
+        self.assertLess(elapsed, 2)
+        self.assertEqual(responses[0].status_code, 200)
+        self.assertEqual(Payment.objects.count(), 5)
+        # Слот освобожден — следующая загрузка проходит
+        self.assertEqual(self.post_statement(self.headers, self.rows(200)).status_code, 200)
+
+    def test_slot_released_after_error(self):
+        with mock.patch.object(AccountManager, "resolve", side_effect=RuntimeError("insert failed")):
+            with self.assertRaisesMessage(RuntimeError, "insert failed"):
+                self.post_statement(self.headers, self.rows(1))
+        response = self.post_statement(self.headers, self.rows(1))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["added_payments"], 5)
+
+    @override_settings(PAYMENTS_PARSE_USER_RATE="1/h")
+    def test_rate_limit_returns_retry_after(self):
+        self.assertEqual(self.post_statement(self.headers, self.rows(1)).status_code, 200)
+        response = self.post_statement(self.headers, self.rows(100))
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
@@ -0,0 +1,119 @@
+# apps/paymets/throttling.py
+"""
+Контроль нагрузки на /payments/parse.
+
+Разбор выписки занимает воркер на секунды, поэтому кроме ограничения частоты
+(сколько загрузок в час) есть ограничение параллельности: сколько разборов
+одновременно может идти у одного пользователя и у всего сервиса. Так загрузки
+не занимают все воркеры и /payments, /sync продолжают отвечать.
+При превышении любого лимита отдается 429 с заголовком Retry-After.
+"""
+import os
+from contextlib import contextmanager
+
+from django.conf import settings
+from ninja.errors import Throttled
+from ninja.throttling import SimpleRateThrottle, UserRateThrottle
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class ParseUserRateThrottle(UserRateThrottle):
+    """Частота загрузок одного пользователя (PAYMENTS_PARSE_USER_RATE)."""
+    scope = "parse_user"
+
+
+class ParseGlobalRateThrottle(SimpleRateThrottle):
+    """Общая частота загрузок по всему сервису (PAYMENTS_PARSE_GLOBAL_RATE)."""
+    scope = "parse_global"
+
+    def get_cache_key(self, request):
+        return self.cache_format % {"scope": self.scope, "ident": "all"}
+
+
+def parse_throttles() -> list:
+    """Ограничения частоты из настроек; пустой лимит отключает проверку."""
+    throttles = []
+    if settings.PAYMENTS_PARSE_USER_RATE:
+        throttles.append(ParseUserRateThrottle(settings.PAYMENTS_PARSE_USER_RATE))
+    if settings.PAYMENTS_PARSE_GLOBAL_RATE:
+        throttles.append(ParseGlobalRateThrottle(settings.PAYMENTS_PARSE_GLOBAL_RATE))
+    return throttles
+
+
+def _slot_path(scope: str, ident, index: int) -> str:
+    return os.path.join(settings.PAYMENTS_PARSE_LOCK_DIR, f"{scope}-{ident}-{index}.lock")
+
+
+def _try_lock(path: str):
+    """Неблокирующая блокировка файла слота; возвращает дескриптор или None, если слот занят."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock(fd: int):
+    if fcntl is None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    os.close(fd)  # flock снимается вместе с закрытием файла
+
+
+def _acquire_slot(scope: str, ident, limit: int):
+    """
+    Занимает один из limit слотов — блокировку файла в PAYMENTS_PARSE_LOCK_DIR.
+    Слоты живут вне БД: идущий импорт держит блокировку записи SQLite на всю транзакцию,
+    и проверка через БД ждала бы ее до "database is locked". Блокировку файла ОС снимает
+    сама, если воркер упал, поэтому срок аренды не нужен.
+    """
+    os.makedirs(settings.PAYMENTS_PARSE_LOCK_DIR, exist_ok=True)
+    for index in range(limit):
+        fd = _try_lock(_slot_path(scope, ident, index))
+        if fd is not None:
+            return fd
+    return None
+
+
+def _check_rates(request):
+    # Экземпляры на каждый запрос: SimpleRateThrottle хранит историю в атрибутах
+    for throttle in parse_throttles():
+        if not throttle.allow_request(request):
+            raise Throttled(wait=throttle.wait())
+
+
+@contextmanager
+def parse_admission(request, user_id):
+    """
+    Пропускает разбор или бросает Throttled (429). Сначала занимаются слоты параллельности,
+    и только потом засчитывается попытка в лимит частоты — отказ по занятому слоту
+    не расходует часовую квоту пользователя.
+    """
+    limits = (
+        ("user", user_id, settings.PAYMENTS_PARSE_MAX_PER_USER),
+        ("global", "all", settings.PAYMENTS_PARSE_MAX_GLOBAL),
+    )
+    acquired = []
+    try:
+        for scope, ident, limit in limits:
+            if not limit:
+                continue
+            fd = _acquire_slot(scope, ident, limit)
+            if fd is None:
+                raise Throttled(wait=settings.PAYMENTS_PARSE_RETRY_AFTER)
+            acquired.append(fd)
+        _check_rates(request)
+        yield
+    finally:
+        for fd in acquired:
+            _unlock(fd)
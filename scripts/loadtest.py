@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+"""
+Нагрузочный тест HTTP API.
+
+Параллельно гоняет сценарии:
+  - token    — POST /api/token/pair (получение JWT)
+  - refresh  — POST /api/token/refresh
+  - payments — GET  /api/payments/payments со случайными фильтрами
+  - parse    — POST /api/payments/parse с синтетической выпиской Kaspi (Excel XML)
+и печатает p50/p95/p99 латентности, пропускную способность и долю ошибок по каждому.
+Ответы 429 (троттлинг) считаются отдельно, в ошибки и латентность не попадают.
+
+Данные готовятся командой:
+    python manage.py seed_payments --users 10 --payments 5000000
+Запуск:
+    python scripts/loadtest.py --base-url http://localhost:8001 --concurrency 16 --duration 60
+
+/payments/parse ограничен по частоте и параллельности (apps/paymets/throttling.py),
+поэтому с настройками по умолчанию сценарий parse быстро упирается в 429. Чтобы мерить
+сам разбор, сервер для прогона запускают с ослабленными лимитами:
+    PAYMENTS_PARSE_USER_RATE= PAYMENTS_PARSE_GLOBAL_RATE= \
+    PAYMENTS_PARSE_MAX_PER_USER=0 PAYMENTS_PARSE_MAX_GLOBAL=0 python manage.py runserver
+Чтобы проверить сами лимиты — оставить их как есть и смотреть столбец 429.
+
+Использует только стандартную библиотеку, чтобы запускаться с любой машины.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+DEFAULT_MIX = "payments=70,token=10,refresh=15,parse=5"
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.throttled = {}
+
+    def record(self, scenario, elapsed, status):
+        with self._lock:
+            if status == 429:
+                # Отказ троттлинга быстрый — в латентности он занижал бы перцентили
+                self.throttled[scenario] = self.throttled.get(scenario, 0) + 1
+                return
+            self.latencies.setdefault(scenario, []).append(elapsed)
+            if status != 200:
+                self.errors[scenario] = self.errors.get(scenario, 0) + 1
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class Client:
+    def __init__(self, base_url, username, password, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.access = None
+        self.refresh = None
+
+    def request(self, method, path, body=None, headers=None, auth=True):
+        headers = dict(headers or {})
+        if auth and self.access:
+            headers["Authorization"] = f"Bearer {self.access}"
+        req = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def post_json(self, path, payload, auth=True):
+        headers = {"Content-Type": "application/json"}
+        return self.request("POST", path, json.dumps(payload).encode(), headers, auth=auth)
+
+    def login(self):
+        status, body = self.post_json(
+            "/api/token/pair", {"username": self.username, "password": self.password}, auth=False
+        )
+        if status == 200:
+            data = json.loads(body)
+            self.access, self.refresh = data["access"], data["refresh"]
+        return status
+
+
+def kaspi_xml(rows, rng):
+    """Минимальная выписка Kaspi в формате Excel XML Spreadsheet."""
+    today = date.today()
+    cells = ['<Row><Cell><Data ss:Type="String">Дата</Data></Cell>'
+             '<Cell><Data ss:Type="String">Идентификатор платежа</Data></Cell>'
+             '<Cell><Data ss:Type="String">Лицевой счет</Data></Cell>'
+             '<Cell><Data ss:Type="String">Сумма платежа</Data></Cell></Row>']
+    for _ in range(rows):
+        day = today - timedelta(days=rng.randrange(30))
+        cells.append(
+            f'<Row><Cell><Data ss:Type="String">{day.isoformat()}</Data></Cell>'
+            f'<Cell><Data ss:Type="Number">{rng.randrange(10**9, 10**10)}</Data></Cell>'
+            f'<Cell><Data ss:Type="Number">{1_000_000_000 + rng.randrange(300_000)}</Data></Cell>'
+            f'<Cell><Data ss:Type="Number">{round(rng.lognormvariate(8.5, 0.7), 2)}</Data></Cell></Row>'
+        )
+    cells.append('<Row><Cell><Data ss:Type="String">Общая сумма</Data></Cell></Row>')
+    return (
+        '<?xml version="1.0"?>'
+        '<Workbook xmlns="urn:schemas-microsoft-com:office:spreadsheet" '
+        'xmlns:ss="urn:schemas-microsoft-com:office:spreadsheet">'
+        '<Worksheet ss:Name="Данные"><Table>' + "".join(cells) + "</Table></Worksheet></Workbook>"
+    ).encode("utf-8")
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode() + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def run_scenario(name, client, rng, args):
+    """Выполняет сценарий и возвращает HTTP-статус ответа."""
+    if name == "token":
+        return client.login()
+    if name == "refresh":
+        status, body = client.post_json("/api/token/refresh", {"refresh": client.refresh}, auth=False)
+        if status == 200:
+            data = json.loads(body)
+            client.access = data["access"]
+            client.refresh = data.get("refresh", client.refresh)
+        return status
+    if name == "payments":
+        params = {"page": rng.randint(1, 20), "page_size": rng.choice([10, 50, 100])}
+        if rng.random() < 0.7:
+            start = date.today() - timedelta(days=rng.randrange(30, 365))
+            params["start_date"] = start.isoformat()
+            params["end_date"] = (start + timedelta(days=rng.randrange(7, 90))).isoformat()
+        if rng.random() < 0.3:
+            params["bank_ids"] = rng.randint(1, 4)
+        if rng.random() < 0.2:
+            params["account_numbers"] = str(1_000_000_000 + rng.randrange(300_000))
+        status, _ = client.request("GET", "/api/payments/payments?" + urllib.parse.urlencode(params))
+        return status
+    if name == "parse":
+        body, content_type = multipart(
+            {"email": "imex@kaspi.kz"}, {"file": ("kaspi.xml", kaspi_xml(args.parse_rows, rng))}
+        )
+        status, _ = client.request("POST", "/api/payments/parse", body, {"Content-Type": content_type})
+        return status
+    raise ValueError(f"Неизвестный сценарий: {name}")
+
+
+def worker(index, args, scenarios, weights, stats, deadline, counter):
+    rng = random.Random(args.seed + index)
+    client = Client(args.base_url, f"{args.user_prefix}{index % args.users}", args.password, args.timeout)
+    if client.login() != 200:
+        raise SystemExit(f"Не удалось авторизоваться как {client.username}")
+    while time.monotonic() < deadline:
+        if args.requests:
+            with counter["lock"]:
+                if counter["left"] <= 0:
+                    return
+                counter["left"] -= 1
+        name = rng.choices(scenarios, weights=weights)[0]
+        start = time.perf_counter()
+        try:
+            status = run_scenario(name, client, rng, args)
+        except (urllib.error.URLError, OSError, ValueError):
+            status = None
+        stats.record(name, time.perf_counter() - start, status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="Длительность теста, с")
+    parser.add_argument("--requests", type=int, default=0, help="Общее число запросов (0 — ограничение только по времени)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Веса сценариев (по умолчанию {DEFAULT_MIX})")
+    parser.add_argument("--users", type=int, default=10, help="Сколько пользователей seed_payments использовать")
+    parser.add_argument("--user-prefix", default="loadtest_user_")
+    parser.add_argument("--password", default="loadtest-pass")
+    parser.add_argument("--parse-rows", type=int, default=500, help="Строк в синтетической выписке для parse")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    mix = dict(item.split("=") for item in args.mix.split(","))
+    scenarios = [name for name, weight in mix.items() if float(weight) > 0]
+    weights = [float(mix[name]) for name in scenarios]
+
+    stats = Stats()
+    counter = {"lock": threading.Lock(), "left": args.requests}
+    started = time.monotonic()
+    deadline = started + args.duration if not args.requests else float("inf")
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(worker, i, args, scenarios, weights, stats, deadline, counter)
+            for i in range(args.concurrency)
+        ]
+        for future in futures:
+            future.result()
+    wall = time.monotonic() - started
+
+    print(
+        f"{'scenario':<10} {'count':>8} {'errors':>7} {'429':>7} {'rps':>8} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    )
+    total = throttled = 0
+    for name in sorted(set(stats.latencies) | set(stats.throttled)):
+        values = sorted(stats.latencies.get(name, []))
+        total += len(values)
+        throttled += stats.throttled.get(name, 0)
+        print(
+            f"{name:<10} {len(values):>8} {stats.errors.get(name, 0):>7} {stats.throttled.get(name, 0):>7} "
+            f"{len(values) / wall:>8.1f} {percentile(values, 50) * 1000:>9.1f} "
+            f"{percentile(values, 95) * 1000:>9.1f} {percentile(values, 99) * 1000:>9.1f} "
+            f"{(values[-1] if values else 0) * 1000:>9.1f}"
+        )
+    print(
+        f"total: {total} запросов за {wall:.1f} с, {total / wall:.1f} rps, "
+        f"429: {throttled}, concurrency={args.concurrency}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# zheu_backend/db_router.py
+"""
+Маршрутизация чтений на реплику.
+
+Чтения из запросов только на чтение (GET/HEAD/OPTIONS или view, помеченные use_replica)
+уходят в DATABASE_REPLICA_ALIAS, все остальное — в default. После запроса, который
+что-то записал в БД, пользователь REPLICA_STICKY_SECONDS секунд читает с primary,
+чтобы сразу видеть свою загрузку, даже если реплика отстает.
+Вне HTTP-запроса (manage.py, shell) и внутри транзакций всегда используется default.
+"""
+import functools
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Пользователи и сессии читаем только с primary: отстающая реплика не знает
+# только что зарегистрированных пользователей и смененных паролей
+PRIMARY_ONLY_APPS = {"auth", "sessions", "contenttypes"}
+
+_request_state = ContextVar("db_request_state", default=None)
+
+
+class _RequestState:
+    def __init__(self, request, read_only: bool):
+        self.request = request
+        self.read_only = read_only
+        self.sticky = None  # None — еще не проверяли (пользователь мог быть не известен)
+        self.wrote = False
+
+
+def _sticky_key(user_id) -> str:
+    return f"db:sticky:{user_id}"
+
+
+def _request_user_id(request):
+    # request.auth выставляет ninja после JWT-аутентификации, request.user — сессии (админка)
+    user = getattr(request, "auth", None)
+    if user is None or not getattr(user, "is_authenticated", False):
+        user = getattr(request, "user", None)
+    if user is not None and getattr(user, "is_authenticated", False):
+        return user.pk
+    return None
+
+
+def replica_alias():
+    alias = getattr(settings, "DATABASE_REPLICA_ALIAS", None)
+    return alias if alias in settings.DATABASES else None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        state = _request_state.get()
+        if alias is None or state is None or not state.read_only:
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        # Внутри транзакции читаем то же, что пишем
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.sticky is None:
+            user_id = _request_user_id(state.request)
+            if user_id is None:
+                # Пользователь еще не определен — не кэшируем решение
+                return alias
+            state.sticky = bool(cache.get(_sticky_key(user_id)))
+        return DEFAULT_DB_ALIAS if state.sticky else alias
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика — копия default, связи между объектами из обеих баз допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RequestState(request, request.method in SAFE_METHODS)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state.wrote and response.status_code < 400:
+            user_id = _request_user_id(request)
+            if user_id is not None and replica_alias() is not None:
+                cache.set(_sticky_key(user_id), True, timeout=settings.REPLICA_STICKY_SECONDS)
+        return response
+
+
+def use_replica(view_func):
+    """Помечает view как читающее (например, POST-поиск) — его чтения могут идти на реплику."""
+    @functools.wraps(view_func)
+    def wrapper(*args, **kwargs):
+        state = _request_state.get()
+        if state is None or state.read_only:
+            return view_func(*args, **kwargs)
+        state.read_only = True
+        try:
+            return view_func(*args, **kwargs)
+        finally:
+            state.read_only = False
+    return wrapper
@@ -0,0 +1,233 @@
+# zheu_backend/metrics.py
+"""
+Легковесная инструментация запросов в формате Prometheus.
+
+Собирает по маршрутам: латентность, количество и время SQL-запросов, размер ответа.
+Для /payments/parse дополнительно пишутся тайминги фаз (phase()).
+Выключается настройкой METRICS_ENABLED — тогда middleware не подключается вовсе,
+phase() сводится к пустому контекстному менеджеру, а /api/metrics не регистрируется.
+Доступ к /api/metrics — только по METRICS_TOKEN или с адресов METRICS_ALLOWED_IPS.
+"""
+import hmac
+import threading
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # key -> [счетчики по бакетам..., сумма, количество]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {state[-1]}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {state[-2]}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Латентность HTTP-запросов по маршрутам",
+    ("method", "route", "status"),
+))
+RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "Размер тела ответа по маршрутам",
+    ("method", "route"), buckets=SIZE_BUCKETS,
+))
+DB_QUERIES = registry.register(Histogram(
+    "http_request_db_queries", "Количество SQL-запросов на один HTTP-запрос",
+    ("method", "route"), buckets=QUERY_COUNT_BUCKETS,
+))
+DB_TIME = registry.register(Counter(
+    "http_request_db_seconds_total", "Суммарное время SQL-запросов по маршрутам",
+    ("method", "route"),
+))
+PARSE_PHASE = registry.register(Histogram(
+    "payments_parse_phase_seconds", "Длительность фаз загрузки выписки (/payments/parse)",
+    ("phase",),
+))
+PARSE_ROWS = registry.register(Counter(
+    "payments_parse_rows_total", "Строки выписок по фазам разбора и результату (scanned/accepted/skipped:<причина>)",
+    ("phase", "outcome"),
+))
+
+
+class _QueryStats:
+    """execute_wrapper, считающий количество и время SQL-запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def _route_label(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    # Берем шаблон маршрута, а не путь, чтобы не раздувать число серий (id в URL и т.п.)
+    return "/" + match.route if match is not None and match.route else "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = _QueryStats()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        route = _route_label(request)
+        REQUEST_LATENCY.observe(elapsed, method=request.method, route=route, status=response.status_code)
+        DB_QUERIES.observe(stats.count, method=request.method, route=route)
+        DB_TIME.inc(stats.duration, method=request.method, route=route)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(len(response.content), method=request.method, route=route)
+        return response
+
+
+@contextmanager
+def _timed_phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PARSE_PHASE.observe(time.perf_counter() - start, phase=name)
+
+
+def phase(name: str):
+    """Контекстный менеджер для замера фазы загрузки выписки."""
+    if not getattr(settings, "METRICS_ENABLED", False):
+        return nullcontext()
+    return _timed_phase(name)
+
+
+def observe_phase(name: str, seconds: float):
+    """Фаза, время которой измерено снаружи (суммарно по фоновому потоку конвейера)."""
+    if getattr(settings, "METRICS_ENABLED", False):
+        PARSE_PHASE.observe(seconds, phase=name)
+
+
+def record_parse_stats(stats):
+    """Хук для ExcelPaymentParser: переносит статистику фазы в счетчики строк."""
+    PARSE_ROWS.inc(stats.rows_scanned, phase=stats.name, outcome="scanned")
+    PARSE_ROWS.inc(stats.rows_accepted, phase=stats.name, outcome="accepted")
+    for reason, count in stats.skipped.items():
+        PARSE_ROWS.inc(count, phase=stats.name, outcome=f"skipped:{reason}")
+
+
+def parser_hooks() -> list:
+    return [record_parse_stats] if getattr(settings, "METRICS_ENABLED", False) else []
+
+
+def scrape_allowed(request) -> bool:
+    """Пускает скрейпер по токену METRICS_TOKEN или с адреса из METRICS_ALLOWED_IPS."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        scheme, _, value = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(value.strip(), token):
+            return True
+    return request.META.get("REMOTE_ADDR") in getattr(settings, "METRICS_ALLOWED_IPS", ())
+
+
+def render_metrics() -> str:
+    return registry.render()
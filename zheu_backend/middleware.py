@@ -0,0 +1,97 @@
+# zheu_backend/middleware.py
+"""
+Сжатие ответов по Accept-Encoding: brotli (если установлен пакет brotli) или gzip.
+Как и django.middleware.gzip.GZipMiddleware, сжимает и потоковые ответы,
+а в gzip добавляет случайный заполнитель против атаки BREACH.
+"""
+import re
+
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # Необязательная зависимость
+    brotli = None
+
+MIN_LENGTH = 200  # Короткие ответы сжимать невыгодно
+BROTLI_QUALITY = 5  # Баланс CPU/размер для динамических ответов
+GZIP_MAX_RANDOM_BYTES = 100
+
+_token_re = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?")
+
+
+def _accepted_encodings(header: str) -> dict:
+    encodings = {}
+    for part in header.split(","):
+        match = _token_re.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            quality = 0.0
+        encodings[match.group(1).lower()] = quality
+    return encodings
+
+
+def choose_encoding(header: str):
+    encodings = _accepted_encodings(header)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda name: encodings.get(name, 0), default=None)
+    if best is None or encodings.get(best, 0) <= 0:
+        return None
+    return best
+
+
+def _brotli_sequence(sequence):
+    # Как compress_sequence: без flush на каждый кусок — он закрывает блок brotli,
+    # и на мелких кусках поток выходит вдвое больше сжатого целиком
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        if not response.streaming and len(response.content) < MIN_LENGTH:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                # Асинхронные потоки не сжимаем — сервис работает под WSGI
+                return response
+            if encoding == "br":
+                response.streaming_content = _brotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, max_random_bytes=GZIP_MAX_RANDOM_BYTES
+                )
+            del response.headers["Content-Length"]
+        else:
+            if encoding == "br":
+                compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(response.content))
+
+        # Сжатое представление не побайтно равно исходному — ETag становится слабым
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
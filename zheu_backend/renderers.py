@@ -0,0 +1,111 @@
+# zheu_backend/renderers.py
+"""
+Согласование формата ответа API по заголовку Accept.
+
+- application/json (по умолчанию) — через orjson, если он установлен, иначе стандартный json;
+  вывод совпадает с NinjaJSONEncoder (Decimal — строкой, datetime — как в DjangoJSONEncoder).
+- application/msgpack (application/x-msgpack, application/vnd.msgpack) — если установлен msgpack;
+  компактнее и быстрее для массовых клиентов (/payments/sync, выгрузки).
+  Если клиент принимает только MessagePack, а пакета нет, — 406 Not Acceptable.
+
+Сжатие (gzip/brotli по Accept-Encoding) делает zheu_backend.middleware.CompressionMiddleware.
+"""
+import json
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+from ninja_extra import NinjaExtraAPI
+
+try:
+    import orjson
+except ImportError:  # Необязательная зависимость
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Необязательная зависимость
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+_encoder = NinjaJSONEncoder()
+
+
+def _parse_accept(header: str) -> list:
+    """Медиатипы из Accept по убыванию q (при равном q — в порядке заголовка)."""
+    accepted = []
+    for index, part in enumerate(header.split(",")):
+        media_type, *params = (item.strip() for item in part.split(";"))
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.append((-quality, index, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(accepted)]
+
+
+def dumps_json(data) -> bytes:
+    """JSON в байтах в формате NinjaJSONEncoder (через orjson, если он установлен)."""
+    if orjson is not None:
+        # datetime отдаем кодировщику ninja, чтобы формат не отличался от стандартного рендерера
+        return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(data, cls=NinjaJSONEncoder).encode()
+
+
+class NegotiatingRenderer(BaseRenderer):
+    media_type = JSON_MEDIA_TYPE
+    charset = "utf-8"
+
+    def select_media_type(self, request):
+        """Формат ответа по Accept; None — клиент принимает только MessagePack, а msgpack не установлен."""
+        msgpack_requested = False
+        for media_type in _parse_accept(request.META.get("HTTP_ACCEPT", "")):
+            if media_type in MSGPACK_MEDIA_TYPES:
+                if msgpack is not None:
+                    return MSGPACK_MEDIA_TYPES[0]
+                msgpack_requested = True
+            elif media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+                return JSON_MEDIA_TYPE
+        return None if msgpack_requested else JSON_MEDIA_TYPE
+
+    def content_type(self, request) -> str:
+        media_type = self.select_media_type(request)
+        if media_type != MSGPACK_MEDIA_TYPES[0]:
+            return f"{JSON_MEDIA_TYPE}; charset={self.charset}"
+        return media_type
+
+    def render(self, request, data, *, response_status: int):
+        if self.select_media_type(request) == MSGPACK_MEDIA_TYPES[0]:
+            return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+        return dumps_json(data)
+
+
+class NegotiatingNinjaAPI(NinjaExtraAPI):
+    """NinjaExtraAPI, у которого Content-Type ответа зависит от выбранного рендерером формата."""
+
+    def create_response(self, request, data, *, status=None, temporal_response=None):
+        select_media_type = getattr(self.renderer, "select_media_type", None)
+        if select_media_type is not None and select_media_type(request) is None:
+            response = HttpResponse(
+                dumps_json({"detail": "Not Acceptable: MessagePack is not available"}),
+                status=406,
+                content_type=f"{JSON_MEDIA_TYPE}; charset=utf-8",
+            )
+            patch_vary_headers(response, ("Accept",))
+            return response
+        response = super().create_response(request, data, status=status, temporal_response=temporal_response)
+        content_type = getattr(self.renderer, "content_type", None)
+        if content_type is not None:
+            response["Content-Type"] = content_type(request)
+            patch_vary_headers(response, ("Accept",))
+        return response
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 import  os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -49,6 +50,9 @@ INSTALLED_APPS = [
 ]
 CORS_ALLOW_ALL_ORIGINS = True
 MIDDLEWARE = [
+    "zheu_backend.metrics.MetricsMiddleware",  # Первым, чтобы мерить полное время запроса
+    "zheu_backend.middleware.CompressionMiddleware",  # gzip/brotli по Accept-Encoding
+    "zheu_backend.db_router.ReplicaRoutingMiddleware",  # Чтения GET-запросов — на реплику
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -58,6 +62,14 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Инструментация запросов (/api/metrics). При выключении middleware не подключается
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "0") == "1"
+# Доступ к /api/metrics: по токену (Authorization: Bearer <METRICS_TOKEN>) или с адресов из списка
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = [
+    ip.strip() for ip in os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip.strip()
+]
+
 ROOT_URLCONF = "zheu_backend.urls"
 
 TEMPLATES = [
@@ -89,6 +101,37 @@ DATABASES = {
     }
 }
 
+# Реплика для чтения (zheu_backend/db_router.py). Включается переменной DATABASE_REPLICA_NAME;
+# для локальной проверки достаточно копии db.sqlite3 в роли реплики
+if os.environ.get("DATABASE_REPLICA_NAME"):
+    DATABASES["replica"] = {
+        "ENGINE": os.environ.get("DATABASE_REPLICA_ENGINE", "django.db.backends.sqlite3"),
+        "NAME": os.environ["DATABASE_REPLICA_NAME"],
+        "HOST": os.environ.get("DATABASE_REPLICA_HOST", ""),
+        "PORT": os.environ.get("DATABASE_REPLICA_PORT", ""),
+        "USER": os.environ.get("DATABASE_REPLICA_USER", ""),
+        "PASSWORD": os.environ.get("DATABASE_REPLICA_PASSWORD", ""),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["zheu_backend.db_router.PrimaryReplicaRouter"]
+DATABASE_REPLICA_ALIAS = "replica"
+# Сколько секунд после своей записи пользователь читает с primary
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "15"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Файловый кэш общий для всех воркеров на хосте — через него воркеры узнают
+# о смене версии кэша банков (apps/paymets/cache.py)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("DJANGO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "zheu_backend_cache")),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -144,4 +187,43 @@ NINJA_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),                  # Тип заголовка авторизации
     'USER_ID_FIELD': 'id',                             # Поле ID пользователя
     'USER_ID_CLAIM': 'user_id',                        # Имя claim для ID пользователя
-}
\ No newline at end of file
+}
+
+# Логирование
+# Профиль разбора выписок (apps.paymets.parser_exсel) пишется на уровне DEBUG:
+# PAYMENTS_LOG_LEVEL=DEBUG включает его без изменения кода
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "apps.paymets": {
+            "handlers": ["console"],
+            "level": os.environ.get("PAYMENTS_LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
+
+# Настройки приложения платежей (apps.paymets)
+
+# Платежи старше этого горизонта (дни) команда archive_payments переносит в архивную
+# таблицу; /payments читает архив, только если start_date попадает в архивный период
+PAYMENTS_ARCHIVE_HORIZON_DAYS = int(os.environ.get("PAYMENTS_ARCHIVE_HORIZON_DAYS", "365"))
+
+# Ограничения /payments/parse (apps/paymets/throttling.py): частота загрузок
+# ("число/период", пусто — без ограничения) и число одновременных разборов (0 — без ограничения)
+PAYMENTS_PARSE_USER_RATE = os.environ.get("PAYMENTS_PARSE_USER_RATE", "60/h")
+PAYMENTS_PARSE_GLOBAL_RATE = os.environ.get("PAYMENTS_PARSE_GLOBAL_RATE", "600/h")
+PAYMENTS_PARSE_MAX_PER_USER = int(os.environ.get("PAYMENTS_PARSE_MAX_PER_USER", "1"))
+PAYMENTS_PARSE_MAX_GLOBAL = int(os.environ.get("PAYMENTS_PARSE_MAX_GLOBAL", "4"))
+PAYMENTS_PARSE_RETRY_AFTER = int(os.environ.get("PAYMENTS_PARSE_RETRY_AFTER", "10"))  # Retry-After при занятых слотах, с
+# Слоты разбора — блокировки файлов, каталог общий для всех воркеров на хосте, как файловый кэш
+PAYMENTS_PARSE_LOCK_DIR = os.environ.get(
+    "PAYMENTS_PARSE_LOCK_DIR", os.path.join(tempfile.gettempdir(), "zheu_backend_parse_slots")
+)
+
+# Сколько ответов истории счета держит каждый воркер (LRU, apps/paymets/cache.py)
+PAYMENTS_ACCOUNT_HISTORY_CACHE_SIZE = int(os.environ.get("PAYMENTS_ACCOUNT_HISTORY_CACHE_SIZE", "1024"))
@@ -0,0 +1,86 @@
+# zheu_backend/tests/test_db_router.py
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.paymets.models import Payment
+from apps.paymets.tests.base import TEST_SETTINGS
+from zheu_backend import db_router
+
+router = db_router.PrimaryReplicaRouter()
+
+
+@override_settings(**TEST_SETTINGS, REPLICA_STICKY_SECONDS=15)
+@mock.patch.object(db_router, "replica_alias", return_value="replica")
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SimpleNamespace(pk=7, is_authenticated=True)
+
+    def run_request(self, method, view=None, write=False):
+        """Запрос через ReplicaRoutingMiddleware; возвращает базу, выбранную для чтения Payment."""
+        chosen = {}
+
+        def get_response(request):
+            request.user = self.user
+            chosen["payment"] = router.db_for_read(Payment)
+            chosen["user"] = router.db_for_read(User)
+            if write:
+                router.db_for_write(Payment)
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method.lower())("/api/payments/payments")
+        db_router.ReplicaRoutingMiddleware(view or get_response)(request)
+        return chosen
+
+    def test_safe_methods_read_from_replica(self, _):
+        chosen = self.run_request("GET")
+        self.assertEqual(chosen["payment"], "replica")
+        self.assertEqual(chosen["user"], "default")  # auth — только с primary
+        self.assertIsNone(self.run_request("POST")["payment"])
+
+    def test_use_replica_marks_post_as_read_only(self, _):
+        chosen = {}
+
+        @db_router.use_replica
+        def search():
+            chosen["payment"] = router.db_for_read(Payment)
+
+        def view(request):
+            request.user = self.user
+            search()
+            chosen["after"] = router.db_for_read(Payment)
+            return HttpResponse()
+
+        request = RequestFactory().post("/api/payments/payments/query")
+        db_router.ReplicaRoutingMiddleware(view)(request)
+        self.assertEqual(chosen, {"payment": "replica", "after": None})
+
+    def test_reads_inside_transaction_stay_on_primary(self, _):
+        def view(request):
+            request.user = self.user
+            with mock.patch.object(connections["default"], "in_atomic_block", True):
+                view.chosen = router.db_for_read(Payment)
+            return HttpResponse()
+
+        db_router.ReplicaRoutingMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(view.chosen, "default")
+
+    def test_user_reads_primary_after_own_write(self, _):
+        self.run_request("POST", write=True)
+        self.assertEqual(self.run_request("GET")["payment"], "default")
+        # Другой пользователь по-прежнему читает с реплики
+        self.user = SimpleNamespace(pk=8, is_authenticated=True)
+        self.assertEqual(self.run_request("GET")["payment"], "replica")
+        # Когда срок прилипания истек — снова реплика
+        cache.delete(db_router._sticky_key(7))
+        self.user = SimpleNamespace(pk=7, is_authenticated=True)
+        self.assertEqual(self.run_request("GET")["payment"], "replica")
+
+    def test_outside_request_uses_default(self, _):
+        self.assertIsNone(router.db_for_read(Payment))
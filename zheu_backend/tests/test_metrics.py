@@ -0,0 +1,49 @@
+# zheu_backend/tests/test_metrics.py
+from contextlib import nullcontext
+from unittest import skipIf, skipUnless
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from zheu_backend import metrics
+
+
+class ScrapeAccessTests(SimpleTestCase):
+    def request(self, remote_addr="10.0.0.5", **headers):
+        return RequestFactory().get("/api/metrics", REMOTE_ADDR=remote_addr, **headers)
+
+    @override_settings(METRICS_TOKEN="", METRICS_ALLOWED_IPS=["127.0.0.1"])
+    def test_allowed_ips(self):
+        self.assertTrue(metrics.scrape_allowed(self.request("127.0.0.1")))
+        self.assertFalse(metrics.scrape_allowed(self.request()))
+        # Без настроенного токена любой Bearer не пускает
+        self.assertFalse(metrics.scrape_allowed(self.request(HTTP_AUTHORIZATION="Bearer ")))
+
+    @override_settings(METRICS_TOKEN="s3cret", METRICS_ALLOWED_IPS=[])
+    def test_token(self):
+        self.assertTrue(metrics.scrape_allowed(self.request(HTTP_AUTHORIZATION="Bearer s3cret")))
+        self.assertTrue(metrics.scrape_allowed(self.request(HTTP_AUTHORIZATION="bearer s3cret")))
+        self.assertFalse(metrics.scrape_allowed(self.request(HTTP_AUTHORIZATION="Bearer wrong")))
+        self.assertFalse(metrics.scrape_allowed(self.request(HTTP_AUTHORIZATION="Basic s3cret")))
+        self.assertFalse(metrics.scrape_allowed(self.request()))
+
+
+class MetricsEndpointTests(SimpleTestCase):
+    # URLconf собирается один раз при импорте, поэтому проверяется режим, в котором запущены тесты
+    @skipIf(settings.METRICS_ENABLED, "METRICS_ENABLED=1")
+    def test_disabled(self):
+        self.assertEqual(self.client.get("/api/metrics", REMOTE_ADDR="127.0.0.1").status_code, 404)
+        with self.assertRaises(MiddlewareNotUsed):
+            metrics.MetricsMiddleware(lambda request: None)
+        self.assertIsInstance(metrics.phase("parse"), nullcontext)
+        self.assertEqual(metrics.parser_hooks(), [])
+
+    @skipUnless(settings.METRICS_ENABLED, "METRICS_ENABLED=0")
+    @override_settings(METRICS_TOKEN="s3cret", METRICS_ALLOWED_IPS=[])
+    def test_enabled(self):
+        self.assertEqual(self.client.get("/api/metrics").status_code, 404)
+        response = self.client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        self.assertIn(b"# TYPE http_request_duration_seconds histogram", response.content)
@@ -0,0 +1,77 @@
+# zheu_backend/tests/test_negotiation.py
+import gzip
+import json
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.paymets.cache import bank_cache
+from apps.paymets.models import Bank
+from apps.paymets.tests.base import PASSWORD, TEST_SETTINGS, ApiTestMixin
+from zheu_backend import middleware, renderers
+
+
+@override_settings(**TEST_SETTINGS)
+class NegotiationTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        user = User.objects.create_user("negotiation", password=PASSWORD)
+        Bank.objects.bulk_create(Bank(name=f"Банк {index}", email=f"bank{index}@example.kz") for index in range(30))
+        bank_cache.invalidate()
+        self.headers = self.auth_headers(user)
+
+    def get_banks(self, **headers):
+        return self.client.get("/api/payments/banks", **self.headers, **headers)
+
+    def test_json_by_default(self):
+        response = self.get_banks()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json; charset=utf-8")
+        self.assertIn("Accept", response["Vary"])
+        self.assertEqual(len(response.json()), 30)
+
+    def test_msgpack_only_without_package_is_406(self):
+        with mock.patch.object(renderers, "msgpack", None):
+            response = self.get_banks(HTTP_ACCEPT="application/msgpack")
+            self.assertEqual(response.status_code, 406)
+            self.assertIn("Accept", response["Vary"])
+            # С JSON в списке допустимых — обычный ответ
+            response = self.get_banks(HTTP_ACCEPT="application/msgpack, application/json;q=0.5")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "application/json; charset=utf-8")
+
+    @skipIf(renderers.msgpack is None, "msgpack не установлен")
+    def test_msgpack_matches_json(self):
+        response = self.get_banks(HTTP_ACCEPT="application/x-msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(renderers.msgpack.unpackb(response.content), self.get_banks().json())
+
+    def test_gzip_by_accept_encoding(self):
+        response = self.get_banks(HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.get_banks().json())
+
+    def test_small_response_is_not_compressed(self):
+        bank = Bank.objects.first()
+        response = self.client.get(f"/api/payments/banks/{bank.id}", HTTP_ACCEPT_ENCODING="gzip", **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class ChooseEncodingTests(SimpleTestCase):
+    def test_quality_values(self):
+        with mock.patch.object(middleware, "brotli", None):
+            self.assertEqual(middleware.choose_encoding("gzip, br"), "gzip")
+            self.assertIsNone(middleware.choose_encoding("br"))
+        self.assertIsNone(middleware.choose_encoding("gzip;q=0, identity"))
+        self.assertIsNone(middleware.choose_encoding(""))
+
+    @skipIf(middleware.brotli is None, "brotli не установлен")
+    def test_brotli_stream_is_not_flushed_per_chunk(self):
+        self.assertEqual(middleware.choose_encoding("gzip;q=0.5, br"), "br")
+        chunks = [b'{"id": %d, "account_number": "100%d", "amount": "150.50"}\n' % (i, i % 7) for i in range(5000)]
+        streamed = b"".join(middleware._brotli_sequence(chunks))
+        whole = middleware.brotli.compress(b"".join(chunks), quality=middleware.BROTLI_QUALITY)
+        self.assertEqual(middleware.brotli.decompress(streamed), b"".join(chunks))
+        self.assertLess(len(streamed), len(whole) * 1.2)
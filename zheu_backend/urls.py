@@ -1,18 +1,24 @@
 # zheu_backend/urls.py (основной файл с API)
+import math
+from django.conf import settings
 from django.contrib import admin
+from django.http import HttpResponse
 from django.urls import path
-from ninja_extra import NinjaExtraAPI
+from ninja.errors import Throttled
 from ninja_jwt.controller import NinjaJWTDefaultController
 from ninja_jwt.authentication import JWTAuth  # Импортируем JWTAuth здесь для глобального использования
 from apps.users.api import router as users_router
 from apps.paymets.api import router as payments_router
+from zheu_backend.metrics import render_metrics, scrape_allowed
+from zheu_backend.renderers import NegotiatingNinjaAPI, NegotiatingRenderer
 
 # Создаем API instance с глобальной аутентификацией
-api = NinjaExtraAPI(
+api = NegotiatingNinjaAPI(
     title="My Backend API",
     version="1.0.0",
     description="Backend API с JWT авторизацией",
-    auth=JWTAuth()  # Глобальная аутентификация для всех роутеров (кроме тех, где auth=None)
+    auth=JWTAuth(),  # Глобальная аутентификация для всех роутеров (кроме тех, где auth=None)
+    renderer=NegotiatingRenderer(),  # JSON (orjson) или MessagePack по заголовку Accept
 )
 
 # Регистрируем JWT контроллер (для /token и /token/refresh)
@@ -24,6 +30,26 @@ api.add_router("/users/", users_router)
 
 api.add_router("/payments/", payments_router)
 
+
+# 429 от троттлинга (ninja и apps/paymets/throttling.py) — с подсказкой, когда повторить
+@api.exception_handler(Throttled)
+def throttled(request, exc):
+    response = api.create_response(request, {"detail": str(exc)}, status=429)
+    if exc.wait is not None:
+        response["Retry-After"] = str(max(1, math.ceil(exc.wait)))
+    return response
+
+
+# Метрики в текстовом формате Prometheus. JWT скрейперу не выдаем — вместо него
+# токен METRICS_TOKEN или список адресов METRICS_ALLOWED_IPS; чужим отвечаем 404
+if settings.METRICS_ENABLED:
+    @api.get("/metrics", auth=None, include_in_schema=False)
+    def metrics(request):
+        if not scrape_allowed(request):
+            return HttpResponse("Not Found", status=404)
+        return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', api.urls),  # Все API эндпоинты будут доступны по /api/